@@ -0,0 +1,166 @@
+"""
+Checks AttachmentCache against fake channels, then compares spawn sends with and
+without an asset channel. Run from the repository root:
+
+    python benchmarks/bench_attachments.py --spawns 200 --upload-latency 0.2
+
+The checks cover a cache hit, the fallback for an expired URL, a URL dropped after
+a failed send, message_deleted and one shared upload for concurrent cold sends.
+The fake channels sleep for --upload-latency on sends with a file and for
+--send-latency on the others, so the run needs no Discord token. Exits with
+status 1 if a check fails.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from utils.attachments import AttachmentCache
+from utils.metrics import metrics
+
+IMAGE = "media/achievements.png"
+message_ids = itertools.count(1)
+
+
+class FakeResponse:
+    status = 500
+    reason = "Internal Server Error"
+
+
+class FakeAttachment:
+    __slots__ = ("url",)
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeMessage:
+    __slots__ = ("id", "attachments")
+
+    def __init__(self, attachments):
+        self.id = next(message_ids)
+        self.attachments = attachments
+
+
+class FakeChannel:
+    """Counts uploads and embeds, and fails the next `failures` embed sends."""
+
+    def __init__(self, upload_latency: float = 0, send_latency: float = 0, expires: float = None):
+        self.upload_latency = upload_latency
+        self.send_latency = send_latency
+        self.expires = expires
+        self.uploads = 0
+        self.embeds = 0
+        self.failures = 0
+
+    async def send(self, content=None, file=None, embed=None):
+        if file is not None:
+            await asyncio.sleep(self.upload_latency)
+            self.uploads += 1
+            return FakeMessage([FakeAttachment(self.url())])
+        await asyncio.sleep(self.send_latency)
+        if self.failures:
+            self.failures -= 1
+            raise discord.HTTPException(FakeResponse(), "embed failed")
+        self.embeds += 1
+        return FakeMessage([])
+
+    def url(self) -> str:
+        query = f"?ex={int(self.expires):x}" if self.expires is not None else ""
+        return f"https://cdn.example/{next(message_ids)}.png{query}"
+
+
+def make_cache(asset_channel):
+    return AttachmentCache(asset_channel=asset_channel, make_file=lambda path: path, make_embed=lambda url: url)
+
+
+async def checks():
+    """Returns the names of the failed checks."""
+    failed = []
+
+    def check(name, ok):
+        print(f"{'ok' if ok else 'FAIL':>4}  {name}")
+        if not ok:
+            failed.append(name)
+
+    channel, assets = FakeChannel(), FakeChannel()
+    cache = make_cache(None)
+    await cache.send(channel, IMAGE)
+    await cache.send(channel, IMAGE)
+    check("without an asset channel every send uploads", channel.uploads == 2 and not cache.urls)
+
+    cache = make_cache(assets)
+    await cache.send(channel, IMAGE)
+    await cache.send(channel, IMAGE)
+    check("a cached URL is embedded instead of uploaded", assets.uploads == 1 and channel.embeds == 2)
+
+    expiring = FakeChannel(expires=time.time() + 60)
+    cache = make_cache(expiring)
+    await cache.send(channel, IMAGE)
+    await cache.send(channel, IMAGE)
+    check("a URL about to expire is uploaded again", expiring.uploads == 2)
+
+    assets = FakeChannel()
+    cache = make_cache(assets)
+    await cache.send(channel, IMAGE)
+    stale = cache.urls[IMAGE]
+    channel.failures = 1
+    await cache.send(channel, IMAGE)
+    check("a failed send drops the URL and uploads again", assets.uploads == 2 and cache.urls[IMAGE] != stale)
+
+    host = next(iter(cache.hosts))
+    cache.message_deleted(host)
+    check("deleting the asset message drops its URL", IMAGE not in cache.urls and host not in cache.hosts)
+    await cache.send(channel, IMAGE)
+    check("the next send after a delete uploads again", assets.uploads == 3)
+
+    assets = FakeChannel(upload_latency=0.05)
+    cache = make_cache(assets)
+    await asyncio.gather(*(cache.send(FakeChannel(), IMAGE) for _ in range(25)))
+    check("25 concurrent cold sends share one upload", assets.uploads == 1 and not cache.uploads)
+
+    return failed
+
+
+async def spawns(count: int, asset_channel, upload_latency: float, send_latency: float):
+    cache = make_cache(asset_channel)
+    channels = [FakeChannel(upload_latency, send_latency) for _ in range(count)]
+    start = time.perf_counter()
+    # A few spawns at a time, like ticks of the scheduler
+    for batch in range(0, count, 25):
+        await asyncio.gather(*(cache.send(channel, IMAGE) for channel in channels[batch:batch + 25]))
+    elapsed = time.perf_counter() - start
+    uploads = sum(channel.uploads for channel in channels) + (asset_channel.uploads if asset_channel else 0)
+    return elapsed, uploads
+
+
+async def run(args):
+    failed = await checks()
+
+    for label, assets in (("no asset channel", None), ("asset channel", FakeChannel(args.upload_latency))):
+        elapsed, uploads = await spawns(args.spawns, assets, args.upload_latency, args.send_latency)
+        print(f"{label:>16}: {args.spawns} spawns in {elapsed:.2f} s, {uploads} uploads")
+    print(f"metrics: {metrics.snapshot()['counters']}")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spawns", type=int, default=200)
+    parser.add_argument("--upload-latency", type=float, default=0.2, help="seconds a send with a file takes")
+    parser.add_argument("--send-latency", type=float, default=0.05, help="seconds any other send takes")
+    args = parser.parse_args()
+    failed = asyncio.run(run(args))
+    for name in failed:
+        print(f"FAIL {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Measures /fact latency against a local stub of the Dog API, comparing a new
+ClientSession per call (the old command) with FactFeed. Run from the repository root:
+
+    python benchmarks/bench_facts.py --latency 0.15 --calls 200
+
+The stub serves a fixed pool of facts after an artificial delay, so the run
+needs no network access. It also reports how many duplicates FactFeed served.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.facts import FactFeed
+
+
+def stub_app(latency: float, pool: int):
+    counter = {"requests": 0, "next": 0}
+
+    async def facts(request):
+        counter["requests"] += 1
+        await asyncio.sleep(latency)
+        limit = int(request.query.get("limit", 1))
+        data = []
+        for _ in range(limit):
+            data.append({"id": str(counter["next"]), "type": "fact",
+                         "attributes": {"body": f"Dog fact number {counter['next'] % pool}."}})
+            counter["next"] += 1
+        return web.json_response({"data": data})
+
+    app = web.Application()
+    app.router.add_get("/api/v2/facts", facts)
+    return app, counter
+
+
+async def legacy_fact(base_url):
+    """The request the old /fact command made."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/api/v2/facts?limit=1", timeout=10) as response:
+            data = await response.json()
+            return data["data"][0]["attributes"]["body"]
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:>8}: p50 {statistics.median(samples) * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms")
+
+
+async def run(args):
+    app, counter = stub_app(args.latency, args.pool)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    samples = []
+    for _ in range(args.calls):
+        start = time.perf_counter()
+        await legacy_fact(base_url)
+        samples.append(time.perf_counter() - start)
+    report("legacy", samples)
+    legacy_requests, counter["requests"] = counter["requests"], 0
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20)) as session:
+        feed = FactFeed(base_url=base_url, retry_delay=0.1)
+        feed.start(session)
+        await asyncio.sleep(args.latency * 6)  # let the first refill land
+        samples, served = [], []
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            served.append(await feed.get())
+            samples.append(time.perf_counter() - start)
+            # Commands arrive spread out, give the refill task a turn
+            await asyncio.sleep(args.gap)
+        await feed.stop()
+    report("feed", samples)
+
+    window = served[-min(len(served), args.pool):]
+    print(f"requests: legacy {legacy_requests}, feed {counter['requests']}; feed hits {feed.hits}, misses {feed.misses}, "
+          f"duplicates within the last {len(window)} served: {len(window) - len(set(window))}")
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.15, help="stub response delay in seconds")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--gap", type=float, default=0.01, help="seconds between /fact calls")
+    parser.add_argument("--pool", type=int, default=400, help="distinct facts the stub knows")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
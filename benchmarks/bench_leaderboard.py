@@ -0,0 +1,93 @@
+"""
+Compares the old GROUP BY leaderboard queries with the trigger-maintained totals
+on a synthetic database. Run from the repository root:
+
+    python benchmarks/bench_leaderboard.py --guilds 10000 --rows 1000000
+
+The old global leaderboard ran both GROUP BY queries once per guild, so its
+cost is reported as the measured per-guild time multiplied by the guild count.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DB
+
+DOG_TYPES = ["mutt", "chihuahua", "dalmatian", "german shepherd", "aussie shepherd", "shiba inu", "husky",
+             "poodle", "shih tzu", "imposter", "sparkle dog", "angelic", "eboy"]
+
+# The queries the totals replaced, on the integer-keyed dogs table
+LEGACY_RAREST = """SELECT type_id, SUM(amount) as total_amount FROM dogs WHERE guild_id = ?
+                   GROUP BY type_id ORDER BY total_amount ASC LIMIT 1"""
+LEGACY_TOP = """SELECT user_id, SUM(amount) as total_amount FROM dogs WHERE guild_id = ?
+                GROUP BY user_id ORDER BY total_amount DESC LIMIT 15"""
+
+
+def populate(path, rows, guilds, rng):
+    """Fills a bare dogs table, like a database created before the totals existed."""
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE dogs (type TEXT NOT NULL, amount INTEGER NOT NULL, user_id TEXT NOT NULL,
+                    guild_id TEXT NOT NULL, PRIMARY KEY (type, user_id, guild_id))""")
+    with conn:
+        conn.executemany(
+            "INSERT INTO dogs (type, amount, user_id, guild_id) VALUES (?, ?, ?, ?)",
+            ((DOG_TYPES[i % len(DOG_TYPES)], rng.randint(1, 100),
+              10**17 + (i // len(DOG_TYPES)) // guilds, 10**18 + (i // len(DOG_TYPES)) % guilds)
+             for i in range(rows))
+        )
+    conn.close()
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--guilds", type=int, default=10_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.db")
+        start = time.perf_counter()
+        populate(path, args.rows, args.guilds, rng)
+        print(f"populated {args.rows:,} rows in {args.guilds:,} guilds in {time.perf_counter() - start:.1f} s")
+
+        start = time.perf_counter()
+        db = DB(path)
+        print(f"migrated and backfilled totals in {time.perf_counter() - start:.1f} s")
+
+        guild_ids = [10**18 + rng.randrange(args.guilds) for _ in range(args.repeat)]
+        guilds = iter(guild_ids * 2)
+
+        with db.manager.reader() as conn:
+            legacy = timed(lambda: (conn.execute(LEGACY_RAREST, (next(guilds),)).fetchone(),
+                                    conn.execute(LEGACY_TOP, (next(guilds),)).fetchall()), args.repeat)
+        server = timed(lambda: db.get_leaderboard(rng.choice(guild_ids)), args.repeat)
+        global_ = timed(db.get_global_leaderboard, args.repeat)
+
+        print(f"server leaderboard: legacy {legacy:9.2f} ms   totals {server:7.3f} ms")
+        print(f"global leaderboard: legacy {legacy * args.guilds / 1000:9.1f} s (estimated)   totals {global_:7.3f} ms")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            db.add_dog(rng.choice(DOG_TYPES), 10**17 + rng.randrange(100), 10**18 + rng.randrange(args.guilds))
+        print(f"add_dog with triggers: {(time.perf_counter() - start):.3f} ms per call")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
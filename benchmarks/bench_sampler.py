@@ -0,0 +1,67 @@
+"""
+Compares DogSampler against the old linear get_random_dog and checks that both
+follow the chances in config/dogs.json. Run from the repository root:
+
+    python benchmarks/bench_sampler.py --picks 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sampler import DogSampler
+
+with open("config/dogs.json") as f:
+    dogs = json.load(f)["dogs"]
+
+
+def legacy_random_dog():
+    """The get_random_dog implementation DogSampler replaced."""
+    total_chance = sum(dog["chance"] for dog in dogs)
+    roll = random.uniform(0, total_chance)
+    upto = 0
+    for dog in dogs:
+        if upto + dog["chance"] >= roll:
+            return dog
+        upto += dog["chance"]
+
+
+def chi_square(picks):
+    """Pearson's chi-square of observed picks against the configured chances."""
+    total = sum(dog["chance"] for dog in dogs)
+    observed = {}
+    for dog in picks:
+        observed[dog["name"]] = observed.get(dog["name"], 0) + 1
+    statistic = 0.0
+    for dog in dogs:
+        expected = len(picks) * dog["chance"] / total
+        statistic += (observed.get(dog["name"], 0) - expected) ** 2 / expected
+    return statistic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--picks", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    sampler = DogSampler(dogs, rng=random.Random(args.seed))
+
+    for label, func in [("legacy", legacy_random_dog), ("pick", sampler.pick)]:
+        seconds = timeit.timeit(func, number=args.picks)
+        print(f"{label:>8}: {seconds / args.picks * 1e9:8.1f} ns/pick")
+    seconds = timeit.timeit(lambda: sampler.sample(args.picks), number=1)
+    print(f"{'sample':>8}: {seconds / args.picks * 1e9:8.1f} ns/pick")
+
+    # 12 degrees of freedom, 32.91 is the 99.9% critical value
+    print(f"chi-square legacy {chi_square([legacy_random_dog() for _ in range(args.picks)]):.2f}, "
+          f"sampler {chi_square(sampler.sample(args.picks)):.2f} (df {len(dogs) - 1}, 99.9% critical 32.91)")
+
+
+if __name__ == "__main__":
+    main()
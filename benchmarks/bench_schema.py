@@ -0,0 +1,126 @@
+"""
+Compares the TEXT-keyed dogs table with the integer-keyed one that replaced it, on a
+synthetic database. Run from the repository root:
+
+    python benchmarks/bench_schema.py --rows 1000000
+
+A database is built with the old schema (migrations 1 to 3), measured, upgraded
+in place by DB the way a live database would be, then measured again. Sizes are
+the pages in use, so the free pages the copy leaves behind until a VACUUM don't count.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DB, MIGRATION_BATCH
+from utils.migrations import migrate
+
+DOG_TYPES = ["mutt", "chihuahua", "dalmatian", "german shepherd", "aussie shepherd", "shiba inu", "husky",
+             "poodle", "shih tzu", "imposter", "sparkle dog", "angelic", "eboy"]
+
+LEGACY_AMOUNT = "SELECT amount FROM dogs WHERE type = ? AND user_id = ? AND guild_id = ?"
+LEGACY_LIST = "SELECT type, amount FROM dogs WHERE user_id = ? AND guild_id = ?"
+# What DB.get_dog_amount and DB.list_dogs run now, timed without the reader pool around them
+AMOUNT = """SELECT amount FROM dogs WHERE user_id = ? AND guild_id = ?
+            AND type_id = (SELECT id FROM dog_types WHERE name = ?)"""
+LIST = "SELECT type_id, amount FROM dogs WHERE user_id = ? AND guild_id = ?"
+
+
+def legacy_schema(path, rows, guilds, rng):
+    """Builds the schema as it was before integer keys, filled like populate in bench_leaderboard."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    migrate(conn, [
+        DB.create_base_tables,
+        DB.create_text_aggregates,
+        DB.create_indexes,
+    ])
+    with conn:
+        conn.executemany(
+            "INSERT INTO dogs (type, amount, user_id, guild_id) VALUES (?, ?, ?, ?)",
+            ((DOG_TYPES[i % len(DOG_TYPES)], rng.randint(1, 100),
+              str(10**17 + (i // len(DOG_TYPES)) // guilds), str(10**18 + (i // len(DOG_TYPES)) % guilds))
+             for i in range(rows))
+        )
+    return conn
+
+
+def used_bytes(conn):
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return pages * page_size
+
+
+def measure(func, params):
+    """Mean latency in microseconds of calling func once per params."""
+    start = time.perf_counter()
+    for args in params:
+        func(*args)
+    return (time.perf_counter() - start) / len(params) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--guilds", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    users = args.rows // len(DOG_TYPES)
+    lookups = []
+    for _ in range(args.repeat):
+        n = rng.randrange(users)
+        lookups.append((rng.choice(DOG_TYPES), 10**17 + n // args.guilds, 10**18 + n % args.guilds))
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.db")
+        start = time.perf_counter()
+        conn = legacy_schema(path, args.rows, args.guilds, rng)
+        print(f"populated {args.rows:,} rows in {time.perf_counter() - start:.1f} s")
+
+        before_size = used_bytes(conn)
+        before = {
+            "get amount": measure(lambda *row: conn.execute(LEGACY_AMOUNT, row).fetchone(),
+                                  [(t, str(u), str(g)) for t, u, g in lookups]),
+            "list dogs": measure(lambda *row: conn.execute(LEGACY_LIST, row).fetchall(),
+                                 [(str(u), str(g)) for t, u, g in lookups]),
+        }
+        legacy_rows = sorted((int(u), int(g), t, a) for t, a, u, g in conn.execute("SELECT * FROM dogs"))
+        conn.close()
+
+        start = time.perf_counter()
+        db = DB(path)
+        migration = time.perf_counter() - start
+
+        after_size = used_bytes(db.conn)
+        names = db.type_names
+        after = {
+            "get amount": measure(lambda *row: db.conn.execute(AMOUNT, row).fetchone(),
+                                  [(u, g, t) for t, u, g in lookups]),
+            "list dogs": measure(lambda *row: [(names[t], a) for t, a in db.conn.execute(LIST, row)],
+                                 [(u, g) for t, u, g in lookups]),
+        }
+        migrated_rows = sorted(db.conn.execute(
+            "SELECT user_id, guild_id, dog_types.name, amount FROM dogs JOIN dog_types ON dog_types.id = type_id"
+        ))
+        db.close()
+
+    print(f"migrated in {migration:.1f} s, batches of {MIGRATION_BATCH:,} rows, "
+          f"rows identical: {legacy_rows == migrated_rows}")
+    print(f"{'':>12} {'before':>12} {'after':>12}")
+    print(f"{'size':>12} {before_size / 2**20:9.1f} MB {after_size / 2**20:9.1f} MB")
+    for name in before:
+        print(f"{name:>12} {before[name]:9.2f} us {after[name]:9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Reports the memory held by active spawns in the old guild_dog_states layout and
+in SpawnTable. Run from the repository root:
+
+    python benchmarks/bench_spawn_state.py --spawns 100000
+
+The old layout kept the whole discord.Message of every spawn alive. The stand-in
+used here has discord.Message's slots with only the fields of a spawn message
+filled in, so its numbers are a lower bound.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from utils.spawns import Spawn, SpawnTable
+
+with open("config/dogs.json") as f:
+    dogs = json.load(f)["dogs"]
+
+MESSAGE_SLOTS = tuple(dict.fromkeys(
+    slot for cls in discord.Message.__mro__ for slot in getattr(cls, "__slots__", ())
+))
+MessageStandIn = type("MessageStandIn", (), {"__slots__": MESSAGE_SLOTS})
+
+
+def fake_message(message_id, channel_id):
+    message = MessageStandIn()
+    for slot in MESSAGE_SLOTS:
+        setattr(message, slot, None)
+    message.id = message_id
+    message.channel = channel_id
+    message.content = "A <:mutt_dog:1287525184797937725> mutt has spawned! Type 'dog' to catch it!"
+    message.embeds = []
+    message.mentions = []
+    message.role_mentions = []
+    message.attachments = [{"id": message_id + 1, "filename": "mutt.png", "size": 326380,
+                            "url": f"https://cdn.discordapp.com/attachments/{channel_id}/{message_id}/mutt.png"}]
+    message.reactions = []
+    message.stickers = []
+    message.components = []
+    message._edited_timestamp = None
+    return message
+
+
+def legacy_layout(count, guilds):
+    states = {}
+    for i in range(count):
+        guild_id, channel_id = 10**17 + i % guilds, 2 * 10**17 + i
+        states.setdefault(guild_id, {})[channel_id] = {
+            "current_dog": dogs[i % len(dogs)],
+            "dog_message": fake_message(3 * 10**17 + i, channel_id),
+        }
+    return states
+
+
+def slotted_layout(count, guilds):
+    spawns = SpawnTable()
+    now = datetime.datetime.now().timestamp()
+    for i in range(count):
+        spawns.add(Spawn(2 * 10**17 + i, 3 * 10**17 + i, i % len(dogs), now + i))
+    return spawns
+
+
+def measure(label, build, count, guilds):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    state = build(count, guilds)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{label:>8}: {size / 2**20:8.2f} MiB for {count:,} spawns ({size / count:6.1f} B/spawn)")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spawns", type=int, default=100_000)
+    parser.add_argument("--guilds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    measure("legacy", legacy_layout, args.spawns, args.guilds)
+    measure("slotted", slotted_layout, args.spawns, args.guilds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Counts allocations per handled message for the old inline achievement embeds
+and the prebuilt Templates. Run from the repository root:
+
+    python benchmarks/bench_templates.py --messages 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from utils.templates import Templates
+
+with open("config/achievements.json", encoding="utf-8") as f:
+    achievements = json.load(f)
+with open("config/dogs.json") as f:
+    dogs = json.load(f)["dogs"]
+
+
+def legacy_handle(user_name, claimed):
+    """What every trigger branch of the old on_message did, claimed or not."""
+    embed = discord.Embed(
+        color=discord.Color(0x265526),
+        title="fast dog",
+        description="caught a dog in under 5 seconds! speedy, are we?"
+    )
+    embed.set_author(
+        name="Achievement Unlocked!",
+        icon_url="attachment://achievements.png"
+    )
+    embed.set_footer(text=f"Unlocked by {user_name}")
+
+    async def callback():
+        return embed
+
+    # Both were built whether or not the claim was new
+    return embed, callback
+
+
+def template_handle(templates, user_name, claimed):
+    """The embed is only cloned once the claim turns out to be new."""
+    if not claimed:
+        return templates.achievement("fast_dog", user_name)
+
+
+def measure(label, handle, messages, claimed_ratio):
+    claimed_every = int(1 / (1 - claimed_ratio)) if claimed_ratio < 1 else 0
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    # Results are kept alive so the snapshot diff counts everything each path allocated
+    kept = []
+    start = time.perf_counter()
+    for i in range(messages):
+        claimed = not (claimed_every and i % claimed_every == 0)
+        kept.append(handle(f"user{i % 100}", claimed))
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    size = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    print(f"{label:>9}: {blocks / messages:6.2f} blocks/message  {size / messages:8.1f} B/message  "
+          f"{elapsed / messages * 1e6:6.2f} us/message (under tracemalloc)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--claimed-ratio", type=float, default=0.9,
+                        help="share of messages whose author already has the achievement")
+    args = parser.parse_args()
+
+    templates = Templates(achievements, dogs)
+    measure("legacy", legacy_handle, args.messages, args.claimed_ratio)
+    measure("templates", lambda user_name, claimed: template_handle(templates, user_name, claimed),
+            args.messages, args.claimed_ratio)
+
+
+if __name__ == "__main__":
+    main()
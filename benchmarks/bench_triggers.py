@@ -0,0 +1,90 @@
+"""
+Compares the compiled TriggerTable with the old on_message if/elif chain on a
+synthetic chat stream. Run from the repository root:
+
+    python benchmarks/bench_triggers.py --messages 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.triggers import TriggerTable
+
+WORDS = ("lol", "the", "dog", "is", "so", "cute", "who", "wants", "to", "play", "game", "tonight", "i", "think",
+         "that", "was", "funny", "ok", "yeah", "what", "did", "you", "mean", "by", "this", "bro", "no", "way")
+TRIGGERS = ("huh", "fog", "sog", "cat", "bwaa", "horse", "shusky", "1+1=2", "i lost the game", "please do not the dog")
+
+
+def legacy_chain(content):
+    """The phrase checks of the old on_message, in their original order."""
+    if content.lower() == "i forfeit all mortal possessions to dog":
+        return "yeah"
+    elif content == "horse":
+        return "honse"
+    elif "the game" in content.lower():
+        return "I_hate_you"
+    elif content.lower() == "please do not the dog":
+        return "please_do_not_the_dog"
+    elif content.lower() == "fog":
+        return "fog"
+    elif content.lower() == "cat":
+        return "banished"
+    elif content.lower() == "sog":
+        return "sog"
+    elif content.lower() == "huh":
+        return "huh"
+    elif content.lower() == "bwaa":
+        return "bwaa"
+    elif content.lower() in ["appel", "april"]:
+        return "this_dock_is_holding_an_apple"
+    elif content.lower() in ["shiba x husky", "husky x shiba", "shusky"]:
+        return "canon"
+    elif content.lower() in ["I love cat", "cat > dog"]:
+        return "on_the_run"
+    elif content.lower() in ["1+1=2", "1 + 1 = 2"]:
+        return "mathematician"
+    return None
+
+
+def chat_stream(count, trigger_ratio, rng):
+    messages = []
+    for _ in range(count):
+        if rng.random() < trigger_ratio:
+            messages.append(rng.choice(TRIGGERS))
+        else:
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 14)))
+            messages.append(sentence.capitalize() if rng.random() < 0.3 else sentence)
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--trigger-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    messages = chat_stream(args.messages, args.trigger_ratio, random.Random(args.seed))
+    table = TriggerTable.from_file("config/triggers.json")
+
+    mismatches = sum(
+        1 for content in messages
+        if legacy_chain(content) != getattr(table.match(content), "achievement", None)
+    )
+
+    results = {}
+    for label, dispatch in [("legacy", legacy_chain), ("table", table.match)]:
+        start = time.perf_counter()
+        for content in messages:
+            dispatch(content)
+        results[label] = (time.perf_counter() - start) / len(messages) * 1e9
+        print(f"{label:>8}: {results[label]:8.1f} ns/message")
+    print(f"speedup {results['legacy'] / results['table']:.1f}x, {mismatches} messages dispatched differently")
+
+
+if __name__ == "__main__":
+    main()
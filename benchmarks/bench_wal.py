@@ -0,0 +1,84 @@
+"""
+Measures add_dog latency while other threads keep running get_leaderboard.
+
+Compares the old layout (rollback journal, synchronous=FULL, no mmap) with the
+WAL + reader pool defaults of ConnectionManager. Run from the repository root:
+
+    python benchmarks/bench_wal.py --rows 200000 --readers 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DB
+
+DOG_TYPES = ["mutt", "chihuahua", "dalmatian", "german shepherd", "husky", "poodle", "eboy"]
+
+
+def populate(db, rows, guilds):
+    data = [
+        (DOG_TYPES[i % len(DOG_TYPES)], i // len(DOG_TYPES), i % guilds, random.randint(1, 50))
+        for i in range(rows)
+    ]
+    db.apply_dog_deltas(data)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(label, rows, guilds, readers, writes, **options):
+    with tempfile.TemporaryDirectory() as folder:
+        db = DB(os.path.join(folder, "bench.db"), readers=readers, **options)
+        populate(db, rows, guilds)
+
+        stop = threading.Event()
+        scans = [0]
+
+        def reader():
+            while not stop.is_set():
+                db.get_leaderboard(random.randrange(guilds))
+                scans[0] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+
+        latencies = []
+        for i in range(writes):
+            start = time.perf_counter()
+            db.add_dog(random.choice(DOG_TYPES), random.randrange(rows), random.randrange(guilds))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        db.close()
+
+    print(f"{label:>8}: add_dog p50 {percentile(latencies, 50):7.2f} ms  "
+          f"p99 {percentile(latencies, 99):7.2f} ms  max {max(latencies):7.2f} ms  "
+          f"({scans[0]} leaderboard scans alongside)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--guilds", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=300)
+    args = parser.parse_args()
+
+    run("rollback", args.rows, args.guilds, args.readers, args.writes,
+        journal_mode="DELETE", synchronous="FULL", mmap_size=0)
+    run("wal", args.rows, args.guilds, args.readers, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Checks that every query DB runs is served by an index. Run from the repository root:
+
+    python benchmarks/query_plans.py
+
+Every DB method is called once on a scratch database while the SQL reaching its
+connections is recorded. Each recorded statement is then run through EXPLAIN QUERY
+PLAN and the script exits with status 1 if any of them scans a whole table or
+sorts through a temporary b-tree, unless the statement is listed in EXPECTED_SCANS.
+Run it after changing a query or the schema.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DB
+
+# Statements that are meant to read a whole table, matched by prefix. Startup work such as
+# loading the channel registry or backfilling totals runs before tracing starts.
+EXPECTED_SCANS = ()
+SKIPPED = ("--", "BEGIN", "COMMIT", "ROLLBACK", "PRAGMA", "CREATE", "DROP")
+
+
+def exercise(db):
+    """Calls every query DB has, with a user, guild and channel that exist."""
+    db.add_dog("mutt", 1, 10)
+    db.add_dog("husky", 2, 10, 3)
+    db.apply_dog_deltas([("mutt", 1, 10, 2), ("husky", 2, 10, -1)])
+    db.apply_catches([("mutt", 1, 10, 1)], [(10, 1, "fast_dog")])
+    db.list_achievements(10, 1)
+    db.mark_posted(1 << 40)
+    db.is_posted(1 << 40)
+    db.unmark_posted(1 << 40)
+    db.prune_posted(0)
+    db.remove_dog("mutt", 1, 10)
+    db.get_dog_amount("husky", 2, 10)
+    db.list_dogs(1, 10)
+    db.get_leaderboard(10)
+    db.get_leaderboard_page(10)
+    db.get_leaderboard_page(10, after=(2, 2))
+    db.get_leaderboard_page()
+    db.get_leaderboard_page(after=(2, 2))
+    db.get_global_leaderboard()
+    db.add_channel(100, 10)
+    db.remove_channel(100, 10)
+    db.add_channel(101, 10)
+    db.clear_server_channels(10)
+
+
+def bad_steps(conn, sql):
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [detail for *_, detail in plan
+            if detail.startswith("SCAN") or "TEMP B-TREE" in detail]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the plan of every statement")
+    args = parser.parse_args()
+
+    statements = []
+    with tempfile.TemporaryDirectory() as folder:
+        db = DB(os.path.join(folder, "plans.db"), readers=1)
+        for conn in (db.conn, *db.manager.readers.queue):
+            conn.set_trace_callback(statements.append)
+        exercise(db)
+        for conn in (db.conn, *db.manager.readers.queue):
+            conn.set_trace_callback(None)
+
+        failures = 0
+        seen = set()
+        for sql in statements:
+            sql = " ".join(sql.split())
+            if sql in seen or sql.upper().startswith(SKIPPED):
+                continue
+            seen.add(sql)
+            steps = bad_steps(db.conn, sql)
+            expected = sql.startswith(EXPECTED_SCANS)
+            if steps and not expected:
+                failures += 1
+                print(f"FAIL {sql}\n     {'; '.join(steps)}")
+            elif args.verbose:
+                print(f"ok   {sql}\n     {'; '.join(steps) or 'indexed'}")
+        db.close()
+
+    print(f"{len(seen)} statements checked, {failures} with unexpected scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
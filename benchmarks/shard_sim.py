@@ -0,0 +1,169 @@
+"""
+Runs the sharded spawn and catch path in several processes against one shared
+database, with a fake gateway in place of Discord. Run from the repository root:
+
+    python benchmarks/shard_sim.py --shards 8 --processes 4 --guilds 2000 --seconds 10
+
+Each process owns a group of shards like under launcher.py. The fake gateway
+hands every process the guilds of its shards, and answers each spawn with a
+"dog" message from a random user a moment later. All processes start at once
+on a fresh database, so they also race through the schema migrations.
+
+Afterwards the script checks that every guild was spawned in by exactly one
+process, and that the database holds exactly the dogs and achievements the
+processes caught. It exits with status 1 if either check fails.
+"""
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DB, AsyncDB
+from utils.shards import ShardStates, shard_for, shard_groups
+from utils.spawner import SpawnScheduler
+from utils.spawns import Spawn
+
+
+class FakeGateway:
+    """
+    Stand-in for the Discord gateway of one process: knows the guilds of its shards
+    and delivers "dog" messages to the catch handler.
+    """
+
+    def __init__(self, channels, shard_count: int, shard_ids, users: int, rng):
+        self.shard_count = shard_count
+        self.users = users
+        self.rng = rng
+        # shard_id -> [(guild_id, channel_id)], only for the shards this process runs
+        self.shards = {shard_id: [] for shard_id in shard_ids}
+        for guild_id, channel_id in channels:
+            shard_id = shard_for(guild_id, shard_count)
+            if shard_id in self.shards:
+                self.shards[shard_id].append((guild_id, channel_id))
+
+    async def channels(self, shard_id: int):
+        return self.shards[shard_id]
+
+    async def message_later(self, handler, guild_id: int, channel_id: int):
+        await asyncio.sleep(self.rng.uniform(0, 0.05))
+        await handler(guild_id, channel_id, self.rng.randrange(1, self.users + 1))
+
+
+async def run_worker(path, channels, shard_count, shard_ids, seconds, users, seed):
+    rng = random.Random(seed)
+    db = AsyncDB(DB(path, readers=2), flush_interval=0.1)
+    db.start()
+    gateway = FakeGateway(channels, shard_count, shard_ids, users, rng)
+    spawned, caught, pending = set(), [0], set()
+
+    async def on_dog(guild_id, channel_id, user_id):
+        spawn = states.get(shard_for(guild_id, shard_count)).spawns.claim(channel_id)
+        if spawn is not None:
+            await db.catch_dog("mutt", user_id, guild_id, lambda amount: ["fast_dog"])
+            caught[0] += 1
+
+    async def spawn(guild_id, channel_id):
+        spawns = states.get(shard_for(guild_id, shard_count)).spawns
+        if channel_id in spawns:
+            return
+        spawns.add(Spawn(channel_id, rng.getrandbits(62), 0, time.time()))
+        spawned.add(guild_id)
+        task = asyncio.create_task(gateway.message_later(on_dog, guild_id, channel_id))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    states = ShardStates(lambda shard_id: SpawnScheduler(
+        spawn, functools.partial(gateway.channels, shard_id), min_delay=0.05, max_delay=0.5, interval=0.02, rng=rng,
+        shard_id=shard_id
+    ))
+    for shard_id in shard_ids:
+        states.get(shard_id).scheduler.start()
+
+    await asyncio.sleep(seconds)
+    states.stop()
+    # A cancelled spawn can still start a catch before it sees the cancellation
+    await asyncio.gather(*(task for state in states for task in list(state.scheduler.inflight)), return_exceptions=True)
+    while pending:
+        await asyncio.gather(*list(pending))
+    await db.close()
+    return sorted(spawned), caught[0]
+
+
+def worker(path, channels, shard_count, shard_ids, seconds, users, seed, results):
+    try:
+        results.put((shard_ids, *asyncio.run(run_worker(path, channels, shard_count, shard_ids, seconds, users, seed)), None))
+    except Exception as e:
+        results.put((shard_ids, [], 0, repr(e)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--guilds", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    channels = [(rng.randrange(1 << 40, 1 << 60), rng.randrange(1 << 40, 1 << 60)) for _ in range(args.guilds)]
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "database.db")
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, channels, args.shards, group, args.seconds,
+                                                         args.users, args.seed + i, results))
+            for i, group in enumerate(shard_groups(args.shards, args.processes))
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(path)
+        stored = conn.execute("SELECT COALESCE(SUM(amount), 0) FROM dogs").fetchone()[0]
+        achievements = conn.execute("SELECT COUNT(*) FROM achievements").fetchone()[0]
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        expected_achievements = conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT guild_id, user_id FROM dogs)").fetchone()[0]
+        conn.close()
+
+    failures = []
+    owners = {}
+    for shard_ids, spawned, caught, error in outcomes:
+        print(f"shards {shard_ids}: spawned in {len(spawned):,} guilds, caught {caught:,} dogs" + (f", error {error}" if error else ""))
+        if error:
+            failures.append(f"shards {shard_ids} failed: {error}")
+        for guild_id in spawned:
+            owners.setdefault(guild_id, []).append(shard_ids)
+    shared = [guild_id for guild_id, groups in owners.items() if len(groups) > 1]
+    caught = sum(outcome[2] for outcome in outcomes)
+
+    if shared:
+        failures.append(f"{len(shared)} guilds were spawned in by more than one process")
+    if stored != caught:
+        failures.append(f"database holds {stored} dogs, processes caught {caught}")
+    if achievements != expected_achievements:
+        failures.append(f"database holds {achievements} achievements, expected {expected_achievements}")
+
+    print(f"{caught:,} catches by {len(processes)} processes in {elapsed:.1f} s ({caught / elapsed:,.0f}/s), "
+          f"{len(owners):,} of {args.guilds:,} guilds spawned in, schema version {version}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
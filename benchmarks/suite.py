@@ -0,0 +1,316 @@
+"""
+Offline benchmark suite for DogBot's hot paths, no Discord token needed.
+
+    python benchmarks/suite.py --scales 1k,100k,10m --output results.json
+    python benchmarks/suite.py --scales 1k,100k --compare results.json
+
+Each scale builds a synthetic database with that many dogs rows, then times:
+dog picking, the on_message dispatch chain (chatter, phrase triggers and catches)
+with fake Message, Channel and Guild objects, achievement claims and retrieval,
+DB.add_dog, AsyncDB.add_dog, list_dogs, get_leaderboard and leaderboard pages.
+
+Results are written as JSON: ops/sec, p50 and p99 in microseconds per benchmark
+and scale, with the commit they were measured on. --compare prints the change
+against an earlier result file and exits with status 1 if any p50 got slower
+than --tolerance allows.
+
+The dispatch benchmark runs main.on_message itself. main.py is imported with
+DATABASE_PATH pointed at a scratch file, then its db is swapped for the one
+built for each scale.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ach import Achievement, index as achievement_index
+from utils.database import DB, AGGREGATES, AsyncDB
+from utils.sampler import DogSampler
+from utils.shards import shard_for
+from utils.spawns import Spawn
+
+with open("config/dogs.json") as f:
+    DOGS = json.load(f)["dogs"]
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+# Users per guild, so bigger scales mean more guilds rather than bigger ones
+USERS_PER_GUILD = 200
+SHARD_COUNT = 4
+
+
+class FakeGuild:
+    __slots__ = ("id", "shard_id")
+
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.shard_id = shard_for(guild_id, SHARD_COUNT)
+
+
+class FakeChannel:
+    """Records what would have been sent or deleted instead of calling Discord."""
+
+    __slots__ = ("id", "sent", "deleted")
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = 0
+        self.deleted = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+    def get_partial_message(self, message_id: int):
+        return self
+
+    async def delete(self):
+        self.deleted += 1
+
+
+class FakeUser:
+    __slots__ = ("id", "name", "bot")
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.bot = False
+
+
+class FakeMessage:
+    __slots__ = ("content", "author", "guild", "channel", "_state")
+
+    def __init__(self, content: str, author, guild, channel):
+        self.content = content
+        self.author = author
+        self.guild = guild
+        self.channel = channel
+        self._state = None  # read by the commands extension, which finds no prefix and stops
+
+
+def snowflake(n: int) -> int:
+    return (1 << 60) + n
+
+
+def populate(path: str, rows: int):
+    """
+    Builds a database with `rows` dogs rows. The totals triggers are dropped while the
+    rows go in and the totals are backfilled afterwards, which is much faster at 10M rows.
+    """
+    db = DB(path)
+    conn = db.conn
+    type_ids = [db._type_id(dog["name"]) for dog in DOGS]
+    with conn:
+        for table in AGGREGATES:
+            conn.execute(f"DROP TABLE {table}")
+            for event in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER {table}_{event}")
+
+    per_user = len(type_ids)
+    users = max(1, rows // per_user)
+
+    def generate():
+        # In primary key order, so the WITHOUT ROWID table is appended to
+        made = 0
+        for user in range(users):
+            user_id, guild_id = snowflake(user), snowflake(10**9 + user // USERS_PER_GUILD)
+            for type_id in sorted(type_ids):
+                if made == rows:
+                    return
+                yield user_id, guild_id, type_id, 1 + (user * 7 + type_id) % 50
+                made += 1
+
+    with conn:
+        conn.executemany("INSERT INTO dogs (user_id, guild_id, type_id, amount) VALUES (?, ?, ?, ?)", generate())
+    with conn:
+        DB.create_aggregates(conn)
+    db.close()
+    return users, max(1, (users + USERS_PER_GUILD - 1) // USERS_PER_GUILD)
+
+
+def summarize(samples, elapsed: float) -> dict:
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "ops_per_sec": len(samples) / elapsed if elapsed else 0.0,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+    }
+
+
+def measure(func, args_list) -> dict:
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for args in args_list:
+        before = clock()
+        func(*args)
+        samples.append(clock() - before)
+    return summarize(samples, clock() - start)
+
+
+async def measure_async(func, args_list, setup=None) -> dict:
+    """Like measure for coroutine functions. setup(*args) runs untimed before each call."""
+    samples = []
+    clock = time.perf_counter
+    elapsed = 0.0
+    for args in args_list:
+        if setup is not None:
+            setup(*args)
+        before = clock()
+        await func(*args)
+        sample = clock() - before
+        samples.append(sample)
+        elapsed += sample
+    return summarize(samples, elapsed)
+
+
+def import_bot(folder: str):
+    """
+    Imports main.py without starting the bot, with its own database in folder.
+    """
+    os.environ["DATABASE_PATH"] = os.path.join(folder, "bot.db")
+    import main as dogbot
+    # Stands in for the logged-in account, which on_message and the commands extension compare authors to
+    dogbot.bot._connection.user = FakeUser(1)
+    return dogbot
+
+
+async def run_async(dogbot, path: str, users: int, guilds: int, repeat: int, rng) -> dict:
+    db = AsyncDB(DB(path))
+    db.start()
+    # The handlers look db up when they run, so they use this scale's database
+    dogbot.db = db
+    results = {}
+    try:
+        # Existing users, so reads hit populated rows
+        lookups = [(snowflake(n), snowflake(10**9 + n // USERS_PER_GUILD)) for n in (rng.randrange(users) for _ in range(repeat))]
+
+        def spawn(message):
+            if message.content == "dog":
+                dogbot.shard_states.get(message.guild.shard_id).spawns.add(
+                    Spawn(message.channel.id, rng.getrandbits(62), rng.randrange(len(DOGS)), time.time()))
+
+        phrases = [phrase for trigger in dogbot.triggers.triggers for phrase in trigger.phrases]
+        chatter = ["hello there", "anyone up for a game later", "lol", "what a good boy", "brb"]
+        messages = []
+        for user_id, guild_id in lookups:
+            roll = rng.random()
+            content = "dog" if roll < 0.2 else rng.choice(phrases) if roll < 0.3 else rng.choice(chatter)
+            messages.append((FakeMessage(content, FakeUser(user_id), FakeGuild(guild_id), FakeChannel(guild_id + 1)),))
+        results["on_message"] = await measure_async(dogbot.on_message, messages, setup=spawn)
+
+        achievement_ids = list(achievement_index)
+        claims = [(db, guild_id, user_id, rng.choice(achievement_ids)) for user_id, guild_id in lookups]
+        results["achievement_claim"] = await measure_async(Achievement.Claim, claims)
+        results["achievement_retrieve"] = await measure_async(Achievement.Retrieve, [(db, g, u) for _, g, u, _ in claims])
+
+        names = [dog["name"] for dog in DOGS]
+        results["async_add_dog"] = await measure_async(
+            db.add_dog, [(rng.choice(names), user_id, guild_id) for user_id, guild_id in lookups])
+        results["async_list_dogs"] = await measure_async(db.list_dogs, lookups)
+        pages = [(guild_id,) for _, guild_id in lookups]
+        results["async_leaderboard_page"] = await measure_async(db.get_leaderboard_page, pages)
+    finally:
+        await db.close()
+    return results
+
+
+def run_scale(dogbot, label: str, rows: int, repeat: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "bench.db")
+        start = time.perf_counter()
+        users, guilds = populate(path, rows)
+        print(f"[{label}] populated {rows:,} rows, {users:,} users in {guilds:,} guilds "
+              f"in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+        sampler = DogSampler(DOGS, rng=random.Random(seed))
+        results = {"get_random_dog": measure(sampler.pick_index, [()] * (repeat * 10))}
+
+        db = DB(path)
+        names = [dog["name"] for dog in DOGS]
+        lookups = [(snowflake(n), snowflake(10**9 + n // USERS_PER_GUILD)) for n in (rng.randrange(users) for _ in range(repeat))]
+        results["db_add_dog"] = measure(db.add_dog, [(rng.choice(names), u, g) for u, g in lookups])
+        results["db_list_dogs"] = measure(db.list_dogs, lookups)
+        results["db_get_leaderboard"] = measure(db.get_leaderboard, [(g,) for _, g in lookups])
+        results["db_global_leaderboard"] = measure(db.get_global_leaderboard, [()] * min(repeat, 1000))
+        db.close()
+
+        results.update(asyncio.run(run_async(dogbot, path, users, guilds, repeat, rng)))
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Prints p50 changes against a baseline report. Returns False if anything regressed."""
+    ok = True
+    print(f"{'scale':>6} {'benchmark':<24} {'base p50':>10} {'p50':>10} {'change':>8}  (baseline {baseline.get('commit')})")
+    for scale, benchmarks in report["results"].items():
+        for name, result in benchmarks.items():
+            base = baseline.get("results", {}).get(scale, {}).get(name)
+            if base is None:
+                continue
+            change = result["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+            flag = ""
+            if change > tolerance:
+                ok, flag = False, "  REGRESSED"
+            print(f"{scale:>6} {name:<24} {base['p50_us']:8.2f}us {result['p50_us']:8.2f}us {change:+7.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1k,100k,10m", help=f"comma separated, from {', '.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=2000, help="timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare p50s against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before failing a comparison")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    labels = [label.strip().lower() for label in args.scales.split(",")]
+    for label in labels:
+        if label not in SCALES:
+            parser.error(f"unknown scale {label!r}")
+    with tempfile.TemporaryDirectory() as scratch:
+        dogbot = import_bot(scratch)
+        dogbot.db.db.close()  # never used, each scale swaps in its own database
+        for label in labels:
+            report["results"][label] = run_scale(dogbot, label, SCALES[label], args.repeat, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    elif not args.compare:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(report, baseline, args.tolerance) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Runs DogBot as several processes, each owning a contiguous group of shards.
+
+    python launcher.py --shards 8 --processes 2
+
+Every process runs main.py with SHARD_COUNT and SHARD_IDS set, sharing the
+database in databases/. Processes are started a few seconds apart so their
+shards don't all identify with the gateway at once, and a process that exits
+is restarted after a delay that grows while it keeps crashing.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from utils.shards import shard_groups
+
+def describe(group):
+    return f"{group[0]}-{group[-1]}" if len(group) > 1 else str(group[0])
+
+class Worker:
+    """
+    One main.py process and the shards it runs.
+    """
+
+    __slots__ = ("group", "process", "restarts", "started_at")
+
+    def __init__(self, group):
+        self.group = group
+        self.process = None
+        self.restarts = 0
+        self.started_at = 0.0
+
+    def start(self, shard_count: int, command):
+        env = dict(os.environ, SHARD_COUNT=str(shard_count), SHARD_IDS=",".join(map(str, self.group)))
+        # In its own session, so a Ctrl+C in the terminal only reaches the launcher, which forwards it
+        self.process = subprocess.Popen(command, env=env, start_new_session=True)
+        self.started_at = time.monotonic()
+        print(f"Started shards {describe(self.group)} as process {self.process.pid}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", type=int, default=int(os.getenv("SHARD_COUNT", "1")), help="total shard count")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--stagger", type=float, default=5.0, help="seconds between two process starts")
+    parser.add_argument("--max-backoff", type=float, default=300.0, help="longest wait before a restart")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="command to run instead of main.py")
+    args = parser.parse_args()
+    command = args.command or [sys.executable, "main.py"]
+
+    workers = [Worker(group) for group in shard_groups(args.shards, args.processes)]
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker in workers:
+        if stopping:
+            break
+        worker.start(args.shards, command)
+        time.sleep(args.stagger)
+
+    restart_at = {}  # Worker -> monotonic time of its next start
+    while not stopping:
+        now = time.monotonic()
+        for worker in workers:
+            if worker in restart_at:
+                if now >= restart_at[worker]:
+                    del restart_at[worker]
+                    worker.start(args.shards, command)
+                continue
+            if worker.process is None or worker.process.poll() is None:
+                continue
+            # A process that ran for a while before exiting starts over with a short delay
+            if now - worker.started_at > args.max_backoff:
+                worker.restarts = 0
+            delay = min(args.max_backoff, args.stagger * 2 ** worker.restarts)
+            worker.restarts += 1
+            print(f"Shards {describe(worker.group)} exited with {worker.process.returncode}, restarting in {delay:.0f} s")
+            restart_at[worker] = now + delay
+        time.sleep(1)
+
+    # bot.run closes cleanly on SIGINT, flushing its catch queue. Forwarded whichever
+    # signal stopped the launcher, since the processes don't get the terminal's Ctrl+C.
+    for worker in workers:
+        if worker.process is not None and worker.process.poll() is None:
+            worker.process.send_signal(signal.SIGINT)
+    for worker in workers:
+        if worker.process is not None:
+            try:
+                worker.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+if __name__ == "__main__":
+    main()
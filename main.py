@@ -1,7 +1,8 @@
 import asyncio
+import functools
 from typing import List, Tuple
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.ui import Button, View
 import os
 from dotenv import load_dotenv
@@ -11,14 +12,25 @@ import json
 import time
 
 # local files
-from utils.database import DB
-from utils.ach import Achievement
+from utils.database import DB, AsyncDB
+from utils.ach import Achievement, index as achievement_index
+from utils.spawner import SpawnScheduler
+from utils.sampler import DogSampler
+from utils.attachments import AttachmentCache
+from utils.media import MediaRegistry
+from utils.triggers import TriggerTable
+from utils.templates import Templates
+from utils.metrics import metrics
+from utils.spawns import Spawn
+from utils.shards import ShardStates, shard_options
+from utils.dogboard import BoardConfig, ReactionCounter
+from utils.facts import FactFeed
 
 # Load environment variables
 load_dotenv()
 
-# Server config
-db = DB()
+# Server config. DATABASE_PATH moves the database, benchmarks/suite.py points it at a scratch file.
+db = AsyncDB(DB(os.getenv("DATABASE_PATH", os.path.join("databases", "database.db"))))
 
 # Load dog json from file, important step
 try:
@@ -32,662 +44,357 @@ except json.JSONDecodeError as e:
     print(f"Error parsing dogs.json: {e}")
     exit(1)
 
-# Initialize variables
-guild_dog_states = {}
+# Weighted dog picker, built once from the chances in dogs.json
+dog_sampler = DogSampler(dogs)
+
+# Achievement and spawn payloads, built once
+templates = Templates(achievement_index.values(), dogs)
+
+# Phrase triggers, compiled once from triggers.json
+triggers = TriggerTable.from_file("config/triggers.json")
+
+# Every image the bot sends, read once at startup. Set MEDIA_MAX_SIZE=0 to send originals.
+media = MediaRegistry(max_dimension=int(os.getenv("MEDIA_MAX_SIZE", "512")))
+media.load([dog["image"] for dog in dogs] + ["media/achievements.png"] + [trigger.image for trigger in triggers.triggers if trigger.image])
+
+# Prefetched dog facts. Set DOG_API_URL to point /fact at another server.
+fact_feed = FactFeed(base_url=os.getenv("DOG_API_URL", "https://dogapi.dog"))
+
+# Seconds between two metrics log lines, 0 turns them off
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "300"))
+
+async def log_metrics(interval: float):
+    """Prints a metrics snapshot every interval seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        print(metrics.format())
 
 # intents and bot instance
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True  # Needed for slash commands
-bot = commands.Bot(command_prefix='!dog=', intents=intents)
 
-EMOJI_ID = "<:staring_dog:1285440635117113344>"
-PROCESSED_IDS_FILE = "databases/processed_ids.json"
-
-# Load processed message IDs from file
-def load_processed_ids():
-    if os.path.exists(PROCESSED_IDS_FILE):
-        try:
-            with open(PROCESSED_IDS_FILE, "r") as file:
-                data = json.load(file)
-                if isinstance(data, list):
-                    return set(data)
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"Error loading JSON file: {e}")
-    return set()
-
-# Save processed message IDs to file
-def save_processed_ids(processed_ids):
-    with open(PROCESSED_IDS_FILE, "w") as file:
-        json.dump(list(processed_ids), file)
-
-# Initialize the processed message IDs
-processed_message_ids = load_processed_ids()
+# Shards every guild over one or more gateway connections. SHARD_COUNT and SHARD_IDS
+# pick the shards this process runs, see launcher.py to run groups of shards as processes.
+class DogBot(commands.AutoShardedBot):
+    http_session = None
+    metrics_task = None
+
+    async def setup_hook(self):
+        """Starts background work that needs the running event loop."""
+        db.start()
+        # One pooled session for every outside HTTP call, kept for the life of the bot
+        self.http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300))
+        fact_feed.start(self.http_session)
+        if METRICS_INTERVAL > 0:
+            self.metrics_task = asyncio.create_task(log_metrics(METRICS_INTERVAL))
+
+    async def close(self):
+        """Flushes queued catches to the database and closes the HTTP session before shutting down."""
+        shard_states.stop()
+        if self.metrics_task is not None:
+            self.metrics_task.cancel()
+        await fact_feed.stop()
+        await super().close()
+        if self.http_session is not None:
+            await self.http_session.close()
+        await db.close()
+
+bot = DogBot(command_prefix='!dog=', intents=intents, **shard_options())
+
+# DogBoard settings per guild, and the staring dog reactions seen on recent messages
+boards = BoardConfig.from_file("config/dogboard.json")
+reaction_counts = ReactionCounter()
+
+# Optional channel that hosts uploaded spawn images so they can be reused by URL
+ASSET_CHANNEL_ID = os.getenv("ASSET_CHANNEL_ID")
+
+# Uploaded spawn images, reused by CDN URL if there is an asset channel. A partial channel needs
+# no cache lookup, so it works in every process, not only the one whose shards hold its guild.
+attachment_cache = AttachmentCache(
+    asset_channel=bot.get_partial_messageable(int(ASSET_CHANNEL_ID)) if ASSET_CHANNEL_ID else None,
+    make_file=media.file
+)
 
 @bot.event
 async def on_ready():
     """Triggered when the bot is ready."""
+    guild_count = len(bot.guilds)
+    if bot.shard_ids is not None and len(bot.shard_ids) < bot.shard_count:
+        # This process only sees the guilds of its own shards
+        guild_count = (await bot.application_info()).approximate_guild_count or guild_count
     await bot.change_presence(
-        activity=discord.Activity(type=discord.ActivityType.playing, name=f"in {len(bot.guilds):,} servers!")
+        activity=discord.Activity(type=discord.ActivityType.playing, name=f"in {guild_count:,} servers!")
     )
     print(f"Logged in as {bot.user.name}")
 
-    if not send_dog_message.is_running():
-        send_dog_message.start()
-
-    await bot.tree.sync()  # Sync commands
-
-
-def get_random_dog():
-    """Helper function to get a random dog based on chance."""
-    total_chance = sum(dog["chance"] for dog in dogs)
-    roll = random.uniform(0, total_chance)
-    upto = 0
-    for dog in dogs:
-        if upto + dog["chance"] >= roll:
-            return dog
-        upto += dog["chance"]
-
-def ClaimAch(gid: int, uid: int, id: str, Callback: callable):
-    achievements = Achievement.Retrieve(gid, uid)
-    if not any(ach['ID'] == id for ach in achievements):
-        Achievement.Claim(gid, uid, id)
-        Callback()
-
-@tasks.loop(minutes=random.randint(1, 5))
-async def send_dog_message():
-    """Periodically sends a message to spawn a random dog in configured channels."""
-    for guild in bot.guilds:
-        try:
-            # Get the list of channels where dogs can spawn for this guild
-            dog_channels = db.list_server_channels(guild.id)
-
-            for channel_id in dog_channels:
-                channel = bot.get_channel(channel_id)
-                if channel is None:
-                    print(f"Skipping guild {guild.name}: Invalid channel {channel_id}.")
-                    continue
-
-                permissions = channel.permissions_for(guild.me)
-                if not permissions.send_messages or not permissions.view_channel:
-                    print(f"Removing channel {channel_id} from guild {guild.id} because the bot can't send messages or view the channel.")
-                    try:
-                        db.remove_channel(channel_id, guild.id)
-                    except Exception as e:
-                        print(f"Error removing channel {channel_id} from database: {e}")
-                    continue
-
-                guild_state = guild_dog_states.get(guild.id, {})
-                channel_state = guild_state.get(channel_id, {"current_dog": None, "dog_message": None})
-
-                if channel_state["current_dog"] is not None:
-                    continue  # Skip if a dog has already spawned in this channel
-
-                current_dog = get_random_dog()
-                if os.path.exists(current_dog['image']):
-                    file = discord.File(current_dog['image'], filename=os.path.basename(current_dog['image']))
-                    dog_message = await channel.send(
-                          f"A {current_dog['emoji']} {current_dog['name']} has spawned! Type 'dog' to catch it!",
-                          file=file
-                    )
-                else:
-                    print(f"Error: File {current_dog['image']} not found!")
-                    return
-
-                # Save the current dog and message for this channel
-                if guild.id not in guild_dog_states:
-                    guild_dog_states[guild.id] = {}
-                guild_dog_states[guild.id][channel_id] = {
-                    "current_dog": current_dog,
-                    "dog_message": dog_message
-                }
-
-        except Exception as e:
-            print(f"Error spawning dog in {guild.name}: {e}")
+    # Commands are global, so only the process running shard 0 syncs them
+    if bot.shard_ids is None or 0 in bot.shard_ids:
+        await bot.tree.sync()  # Sync commands
 
 @bot.event
-async def on_message(message):
-    """Handles dog catching logic and custom phrases."""
-    if isinstance(message.channel, discord.DMChannel) or message.author == bot.user:
-        return
-
-    guild_state = guild_dog_states.get(message.guild.id, {})
-    channel_state = guild_state.get(message.channel.id, {"current_dog": None, "dog_message": None})
-    current_dog = channel_state["current_dog"]
-    dog_message = channel_state["dog_message"]
-
-    if message.content.lower() == 'dog' and current_dog is not None:
-        if message.channel.id == dog_message.channel.id:
-            spawn_time = dog_message.created_at.timestamp()
-            catch_time = time.time()
-            elapsed_time = catch_time - spawn_time
-
-            await dog_message.delete()
+async def on_shard_ready(shard_id: int):
+    """Starts spawning in the guilds of a shard once it's connected."""
+    shard_states.get(shard_id).scheduler.start()
 
-            embed = discord.Embed(title="Dog!")
-            embed.set_image(url="attachment://Dog.png")
-
-            if current_dog['name'] == "eboy":
-                embedC = discord.Embed(
-                    color=discord.Color(0x265526),
-                    title="professional gamer",
-                    description="touch grass please <a:typing:1336980116554645534>"
-                )
-                embedC.set_author(
-                    name="Achievement Unlocked!",
-                    icon_url="attachment://achievements.png"
-                )
-                embedC.set_footer(text=f"Unlocked by {message.author.name}")
-
-                async def callback():
-                    try:
-                        await message.channel.send(embed=embedC, file=discord.File('media/achievements.png'))
-                    except discord.HTTPException as e:
-                        print(f"Error sending achievement: {e}")
-
-                # Claim the achievement
-                ClaimAch(
-                    message.guild.id,
-                    message.author.id,
-                    "professional_gamer",
-                    lambda: asyncio.create_task(callback())
-                )
-            
-            if current_dog['name'] == "sparkle dog":
-                embedC = discord.Embed(
-                    color=discord.Color(0x265526),
-                    title="pretty scene girl!!",
-                    description="you know this pretty scene girl"
-                )
-                embedC.set_author(
-                    name="Achievement Unlocked!",
-                    icon_url="attachment://achievements.png"
-                )
-                embedC.set_footer(text=f"Unlocked by {message.author.name}")
-
-                async def callback():
-                    try:
-                        await message.channel.send(embed=embedC, file=discord.File('media/achievements.png'))
-                    except discord.HTTPException as e:
-                        print(f"Error sending achievement: {e}")
-
-                # Claim the achievement
-                ClaimAch(
-                    message.guild.id,
-                    message.author.id,
-                    "pretty_scene_girl",
-                    lambda: asyncio.create_task(callback())
-                )
-
-            if elapsed_time < 5:
-                embed = discord.Embed(
-                    color=discord.Color(0x265526),
-                    title="fast dog",
-                    description="caught a dog in under 5 seconds! speedy, are we?"
-                )
-                embed.set_author(
-                    name="Achievement Unlocked!",
-                    icon_url="attachment://achievements.png"
-                )
-                embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-                async def callback():
-                    try:
-                        await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-                    except discord.HTTPException as e:
-                        print(f"Error sending achievement: {e}")
-
-                # Claim the achievement
-                ClaimAch(
-                    message.guild.id,
-                    message.author.id,
-                    "fast_dog",
-                    lambda: asyncio.create_task(callback())
-                )
+@bot.event
+async def on_shard_resumed(shard_id: int):
+    shard_states.get(shard_id).scheduler.start()
 
+@bot.event
+async def on_shard_disconnect(shard_id: int):
+    """Pauses spawning in a shard while it can't send messages anyway."""
+    shard_states.get(shard_id).scheduler.stop()
 
-            db.add_dog(current_dog['name'], message.author.id, message.guild.id, 1)
 
-            dogs = db.list_dogs(message.author.id, message.guild.id)
-            amount = next((dog[1] for dog in dogs if dog[0] == current_dog['name']), 0)
+def get_random_dog():
+    """Helper function to get the index of a random dog in dogs based on chance."""
+    return dog_sampler.pick_index()
+
+async def load_spawn_channels(shard_id: int):
+    """Returns the (guild_id, channel_id) pairs dogs can spawn in on one shard."""
+    # Sharded by Discord's formula, guilds that aren't available are skipped by spawn_dog
+    return db.spawn_channels(shard_id, bot.shard_count or 1)
+
+async def spawn_dog(guild_id: int, channel_id: int):
+    """Spawns a random dog in a single channel."""
+    guild = bot.get_guild(guild_id)
+    channel = bot.get_channel(channel_id)
+    if guild is None or channel is None:
+        print(f"Skipping guild {guild_id}: Invalid channel {channel_id}.")
+        return
 
-            if amount >= 1000:
-                embed = discord.Embed(
-                    color=discord.Color(0x265526),
-                    title="ZOO WEE MAMA",
-                    description="gimme some of those"
-                )
-                embed.set_author(
-                    name="Achievement Unlocked!",
-                    icon_url="attachment://achievements.png"
-                )
-                embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-                async def callback():
-                    try:
-                        await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-                    except discord.HTTPException as e:
-                        print(f"Error sending achievement: {e}")
-
-                # Claim the achievement
-                ClaimAch(
-                    message.guild.id,
-                    message.author.id,
-                    "ZOO_WEE_MAMA",
-                    lambda: asyncio.create_task(callback())
-                )
+    permissions = channel.permissions_for(guild.me)
+    if not permissions.send_messages or not permissions.view_channel:
+        print(f"Removing channel {channel_id} from guild {guild.id} because the bot can't send messages or view the channel.")
+        try:
+            await db.remove_channel(channel_id, guild.id)
+        except Exception as e:
+            print(f"Error removing channel {channel_id} from database: {e}")
+        return
 
+    spawns = shard_states.get(guild.shard_id).spawns
+    if channel_id in spawns:
+        return  # Skip if a dog has already spawned in this channel
 
-            await message.channel.send(f'{message.author.name} caught {current_dog["emoji"]} {current_dog["name"]} dog!!!\n'
-                                       f'You have now caught {amount} dogs of that type!!!\n'
-                                       f'This fella was caught in {int(elapsed_time)} seconds!!!')
+    dog_index = get_random_dog()
+    current_dog = dogs[dog_index]
+    if current_dog['image'] not in media:
+        print(f"Error: File {current_dog['image']} not found!")
+        return
 
-            # Clear the state for this channel
-            guild_dog_states[message.guild.id][message.channel.id] = {"current_dog": None, "dog_message": None}
-            
+    dog_message = await attachment_cache.send(
+          channel,
+          current_dog['image'],
+          templates.spawn(current_dog)
+    )
 
-    elif message.content.lower() == "i forfeit all mortal possessions to dog":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="yeah!",
-            description="✅✅✅" # this is what limited time does
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "yeah",
-            lambda: asyncio.create_task(callback())
-        )
+    # Save the current dog and message for this channel
+    spawns.add(Spawn(channel_id, dog_message.id, dog_index, dog_message.created_at.timestamp()))
 
-    elif message.content == "horse":
-        embed = discord.Embed(title="Horse!")
-        embed.set_image(url="attachment://Horse.png")
-        embedC = discord.Embed(
-            color=discord.Color(0x265526),
-            title="🏇",
-            description="actually it’s ‘dog’… but horse is fine..?"
-        )
-        embedC.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embedC.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embedC, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "honse",
-            lambda: asyncio.create_task(callback())
-        )
+# Each configured channel gets a dog every 1 to 5 minutes, scheduled by the shard of its guild
+shard_states = ShardStates(
+    lambda shard_id: SpawnScheduler(spawn_dog, functools.partial(load_spawn_channels, shard_id), min_delay=60, max_delay=300,
+                                    shard_id=shard_id, version=db.channels_version)
+)
 
-        await message.channel.send(embed=embed, file=discord.File('media/Horse.png'))
+# Discord accepts at most this many embeds per message
+MAX_EMBEDS = 10
 
-    elif "the game" in message.content.lower():
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="I hate you",
-            description="…"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "I_hate_you",
-            lambda: asyncio.create_task(callback())
-        )
+async def send_achievements(channel, embeds, content: str = None):
+    """
+    Sends achievement embeds in as few messages as possible, sharing one achievements.png upload per message.
+    The first message also carries content, if given.
+    """
+    for start in range(0, max(len(embeds), 1), MAX_EMBEDS):
+        chunk = embeds[start:start + MAX_EMBEDS]
+        try:
+            if chunk:
+                await channel.send(content, embeds=chunk, file=media.file('media/achievements.png'))
+            else:
+                await channel.send(content)
+        except discord.HTTPException as e:
+            print(f"Error sending achievement: {e}")
+        content = None
+
+async def claim_achievement(message, achievement_id: str):
+    """Claims an achievement for the author of a message. Returns its announcement embed if it's new."""
+    if await Achievement.Claim(db, message.guild.id, message.author.id, achievement_id):
+        return templates.achievement(achievement_id, message.author.name)
+    return None
+
+async def handle_trigger(message, trigger):
+    """Claims the achievement of a phrase trigger and sends its image, if it has one."""
+    embed = await claim_achievement(message, trigger.achievement)
+    if embed is not None:
+        asyncio.create_task(send_achievements(message.channel, [embed]))
+
+    if trigger.image:
+        image_embed = discord.Embed(title=trigger.image_title)
+        image_embed.set_image(url=f"attachment://{os.path.basename(trigger.image)}")
+        await message.channel.send(embed=image_embed, file=media.file(trigger.image))
+
+async def delete_spawn_message(channel, spawn):
+    """Catch stage: removes the spawn message."""
+    with metrics.timer("catch_delete"):
+        attachment_cache.message_deleted(spawn.message_id)
+        await channel.get_partial_message(spawn.message_id).delete()
+
+async def record_catch(message, spawn, elapsed_time: float):
+    """Catch stages: stores the dog, claims achievements and sends the confirmation."""
+    current_dog = dogs[spawn.dog_index]
+
+    def unlocks(amount):
+        """Achievements earned by this catch, given how many of the dog the user has now."""
+        earned = []
+        if current_dog['name'] == "eboy":
+            earned.append("professional_gamer")
+        if current_dog['name'] == "sparkle dog":
+            earned.append("pretty_scene_girl")
+        if elapsed_time < 5:
+            earned.append("fast_dog")
+        if amount >= 1000:
+            earned.append("ZOO_WEE_MAMA")
+        return earned
+
+    with metrics.timer("catch_persist"):
+        # The dog and its achievements are written in the same transaction
+        amount, new = await db.catch_dog(current_dog['name'], message.author.id, message.guild.id, unlocks)
+
+    with metrics.timer("catch_achievements"):
+        unlocked = [templates.achievement(achievement_id, message.author.name) for achievement_id in new]
+
+    with metrics.timer("catch_reply"):
+        # The confirmation and every unlocked achievement go out together
+        await send_achievements(
+            message.channel,
+            unlocked,
+            f'{message.author.name} caught {current_dog["emoji"]} {current_dog["name"]} dog!!!\n'
+            f'You have now caught {amount} dogs of that type!!!\n'
+            f'This fella was caught in {int(elapsed_time)} seconds!!!'
+        )
+    # One send per achievement plus the confirmation, against one send per MAX_EMBEDS achievements
+    metrics.incr("achievement_sends_saved", len(unlocked) + 1 - max(1, -(-len(unlocked) // MAX_EMBEDS)))
+
+async def catch_dog(message, spawn):
+    """
+    Handles a claimed spawn. Deleting the spawn message runs alongside storing the dog
+    and replying, and a failure in one doesn't stop the other.
+    """
+    elapsed_time = time.time() - spawn.spawned_at
 
-    elif message.content.lower() == "please do not the dog":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="please do not the dog",
-            description="that’s not a meme?? ok…"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "please_do_not_the_dog",
-            lambda: asyncio.create_task(callback())
+    with metrics.timer("catch_total"):
+        results = await asyncio.gather(
+            delete_spawn_message(message.channel, spawn),
+            record_catch(message, spawn, elapsed_time),
+            return_exceptions=True
         )
 
+    for stage, result in zip(("deleting the spawn message", "recording the catch"), results):
+        if isinstance(result, Exception):
+            metrics.incr("catch_errors")
+            print(f"Error {stage} in channel {message.channel.id}: {result}")
 
-    elif message.content.lower() == "fog":
-        embed = discord.Embed(title="fog.")
-        embed.set_image(url="attachment://fog.png")
+@bot.event
+async def on_message(message):
+    """Handles dog catching logic and custom phrases."""
+    if isinstance(message.channel, discord.DMChannel) or message.author == bot.user:
+        return
 
-        embedC = discord.Embed(
-            color=discord.Color(0x265526),
-            title="fog <:fog:1287611863290609684>",
-            description="fog"
-        )
-        embedC.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embedC.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embedC, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "fog",
-            lambda: asyncio.create_task(callback())
-        )
-        await message.channel.send(embed=embed, file=discord.File('media/fog.png'))
+    # Lowercased once, shared by the catch check and the trigger table
+    content = message.content.lower()
 
-    elif message.content.lower() == "cat":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="BANISHED <:banished:1302758222201098341>",
-            description="no. Absolutely not. Please seek professional help."
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "banished",
-            lambda: asyncio.create_task(callback())
-        )
-        
-    elif message.content.lower() == "sog":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="sog",
-            description="<:uhok:1289028276672663552>"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "sog",
-            lambda: asyncio.create_task(callback())
-        )
+    # Claimed before any await, so only the first "dog" gets it
+    spawn = shard_states.get(message.guild.shard_id).spawns.claim(message.channel.id) if content == 'dog' else None
 
-    elif message.content.lower() == "huh":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="huh",
-            description="huh"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "huh",
-            lambda: asyncio.create_task(callback())
-        )
+    if spawn is not None:
+        await catch_dog(message, spawn)
+    else:
+        trigger = triggers.match(message.content, content)
+        if trigger is not None:
+            await handle_trigger(message, trigger)
 
-    elif message.content.lower() == "bwaa":
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="bwaa",
-            description="bwaa"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "bwaa",
-            lambda: asyncio.create_task(callback())
-        )
+    await bot.process_commands(message)
 
-    elif message.content.lower() in ["appel", "april"]:
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="this dock is holding an 🍎 April in its Melt",
-            description="🍎🍎🍎"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "this_dock_is_holding_an_apple",
-            lambda: asyncio.create_task(callback())
-        )
+@bot.event
+async def on_raw_message_delete(payload):
+    """Forgets cached image URLs that were hosted on a deleted message and its reaction count."""
+    attachment_cache.message_deleted(payload.message_id)
+    reaction_counts.discard(payload.message_id)
 
-    elif message.content.lower() in ["shiba x husky", "husky x shiba", "shusky"]:
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="canon",
-            description="they've kissed before"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "canon",
-            lambda: asyncio.create_task(callback())
-        )
+@bot.event
+async def on_raw_reaction_add(payload):
+    board = boards.get(payload.guild_id)
+    if board is None or str(payload.emoji) != board.emoji:
+        return
 
-    elif message.content.lower() in ["I love cat", "cat > dog"]:
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="on the run",
-            description="run faster"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "on_the_run",
-            lambda: asyncio.create_task(callback())
-        )
+    # Pruned from the DogBoard history, so it could be posted a second time
+    if db.outlived_history(payload.message_id):
+        return
 
-    elif message.content.lower() in ["1+1=2", "1 + 1 = 2"]:
-        embed = discord.Embed(
-            color=discord.Color(0x265526),
-            title="Mathematician",
-            description="You passed kindergarten!"
-        )
-        embed.set_author(
-            name="Achievement Unlocked!",
-            icon_url="attachment://achievements.png"
-        )
-        embed.set_footer(text=f"Unlocked by {message.author.name}")
-
-        async def callback():
-            try:
-                await message.channel.send(embed=embed, file=discord.File('media/achievements.png'))
-            except discord.HTTPException as e:
-                print(f"Error sending achievement: {e}")
-
-        # Claim the achievement
-        ClaimAch(
-            message.guild.id,
-            message.author.id,
-            "mathematician",
-            lambda: asyncio.create_task(callback())
-        )
+    # Counted locally, the message is only fetched once the count reaches the threshold
+    if reaction_counts.add(payload.message_id) < board.threshold:
+        return
 
-    await bot.process_commands(message)
+    # Messages already on the DogBoard don't need to be fetched again
+    if await db.is_posted(payload.message_id):
+        return
 
-@bot.event
-async def on_raw_reaction_add(payload):
-    emoji = EMOJI_ID
+    # Fetch the message and channel
+    channel = bot.get_channel(payload.channel_id)
+    try:
+        message = await channel.fetch_message(payload.message_id)
+    except discord.NotFound:
+        print("Message not found.")
+        return
+    except discord.Forbidden:
+        print("Bot does not have permissions to fetch the message.")
+        return
 
-    if payload.guild_id not in (None, 1285438304518406174) or str(payload.emoji) != EMOJI_ID:
+    # Check if the staring dog emoji has enough reactions, the real count replaces the local one
+    count = next((reaction.count for reaction in message.reactions if str(reaction.emoji) == board.emoji), 0)
+    reaction_counts.set(message.id, count)
+    if count < board.threshold:
         return
 
-    if str(payload.emoji) == emoji:
-        # Fetch the message and channel
-        channel = bot.get_channel(payload.channel_id)
-        try:
-            message = await channel.fetch_message(payload.message_id)
-        except discord.NotFound:
-            print("Message not found.")
-            return
-        except discord.Forbidden:
-            print("Bot does not have permissions to fetch the message.")
-            return
+    # Create the embed
+    embed = discord.Embed(
+        description=message.content or "No Content", 
+        url=message.jump_url
+    )
+    if message.attachments:
+        embed.set_image(url=message.attachments[0].url)
+    embed.set_author(
+        name=message.author.display_name, 
+        icon_url=message.author.display_avatar.url
+    )
+    embed.set_footer(
+        text=f"Channel: {message.channel.name} • Guild: {message.guild.name}"
+    )
 
-        # Check if the message has already been processed
-        if message.id in processed_message_ids:
-            return
-        
-        # Check if the staring dog emoji has enough reactions
-        for reaction in message.reactions:
-            if str(reaction.emoji) == emoji and reaction.count >= 5:
-                # Create the embed
-                embed = discord.Embed(
-                    description=message.content or "No Content", 
-                    url=message.jump_url
-                )
-                if message.attachments:
-                    embed.set_image(url=message.attachments[0].url)
-                embed.set_author(
-                    name=message.author.display_name, 
-                    icon_url=message.author.display_avatar.url
-                )
-                embed.set_footer(
-                    text=f"Channel: {message.channel.name} • Guild: {message.guild.name}"
-                )
+    # Create a button to jump to the original message
+    button = Button(label="Jump to message", url=message.jump_url)
+    view = View()
+    view.add_item(button)
 
-                # Create a button to jump to the original message
-                button = Button(label="Jump to message", url=message.jump_url)
-                view = View()
-                view.add_item(button)
+    # Record the post first (so you cant spam it..), another reaction may be racing this one
+    if not await db.mark_posted(message.id):
+        return
 
-                # Send the embed with the button to the target channel
-                target_channel = bot.get_channel(1287625403803897908)
-                await target_channel.send(embed=embed, view=view)
+    # Send the embed with the button to the target channel
+    target_channel = bot.get_channel(board.channel_id)
+    try:
+        await target_channel.send(embed=embed, view=view)
+    except discord.HTTPException:
+        await db.unmark_posted(message.id)
+        raise
 
-                # Add the message ID to the processed list (so you cant spam it..)
-                processed_message_ids.add(message.id)
-                save_processed_ids(processed_message_ids)
+@bot.event
+async def on_raw_reaction_remove(payload):
+    """Keeps the local reaction counts in step with removed reactions."""
+    board = boards.get(payload.guild_id)
+    if board is not None and str(payload.emoji) == board.emoji:
+        reaction_counts.remove(payload.message_id)
 
 @bot.tree.command(name="ping", description="Check bot latency")
 async def ping_command(interaction: discord.Interaction):
@@ -727,14 +434,18 @@ async def dog_fact_command(interaction: discord.Interaction):
         A message with a random dog fact.
     """
 
-    await interaction.response.defer()
-    async with aiohttp.ClientSession() as session:
-        async with session.get("https://dogapi.dog/api/v2/facts?limit=1", timeout=10) as response:
-            if response.status == 200:
-                data = await response.json()
-                await interaction.followup.send(data["data"][0]["attributes"]["body"])
-            else:
-                await interaction.followup.send("Failed to fetch a dog fact.", ephemeral=True)
+    # Usually answered from the prefetched buffer, the API is only waited on when it's empty
+    fact = fact_feed.get_nowait()
+    send = interaction.response.send_message
+    if fact is None:
+        await interaction.response.defer()
+        fact = await fact_feed.get()
+        send = interaction.followup.send
+
+    if fact is not None:
+        await send(fact)
+    else:
+        await send("Failed to fetch a dog fact.", ephemeral=True)
 
 @bot.tree.command(name="inventory", description="See all of your dawgs")
 async def inventory_command(interaction: discord.Interaction, member: discord.Member = None):
@@ -753,7 +464,7 @@ async def inventory_command(interaction: discord.Interaction, member: discord.Me
     user_id = member.id if member else interaction.user.id
     guild_id = interaction.guild.id 
 
-    dogs = db.list_dogs(user_id, guild_id)
+    dogs = await db.list_dogs(user_id, guild_id)
 
     embed = discord.Embed(title="Dogs", description="Here are all your dogs:", color=discord.Color.blue())
     display_member = member or interaction.user  # Choose the member to display
@@ -787,7 +498,7 @@ async def achievements(interaction: discord.Interaction, member: discord.Member
     user_id = member.id if member else interaction.user.id
     guild_id = interaction.guild.id 
 
-    achievements = Achievement.Retrieve(guild_id, user_id)
+    achievements = await Achievement.Retrieve(db, guild_id, user_id)
 
     embed = discord.Embed(title="Achievements", description="Here are your achievements:", color=discord.Color.gold())
     display_member = member or interaction.user  
@@ -828,48 +539,63 @@ async def force_remove(interaction: discord.Interaction, member: discord.Member,
     user_id = member.id
     guild_id = interaction.guild.id
     
-    # Check if the user has enough dogs to remove
-    dogs = db.list_dogs(user_id, guild_id)
-    if len(dogs) < amount:
+    # Remove the dogs, only if the user has enough of them
+    if await db.remove_dog(dog, user_id, guild_id, amount) is None:
         await interaction.response.send_message("You don't have that many dogs in your inventory.", ephemeral=True)
         return
 
-    # Remove the dogs
-    db.remove_dog(dog, user_id, guild_id, amount)
     await interaction.response.send_message(f"Removed {amount} {dog} from {member.display_name}'s inventory.", ephemeral=True)
 
+# Users per leaderboard page
+LEADERBOARD_PAGE_SIZE = 15
+
 @bot.tree.command(name="leaderboard", description="Shows the leaderboard")
 async def leaderboard_command(interaction: discord.Interaction):
     """
-    Shows the leaderboard for the current server or globally.
+    Shows the leaderboard for the current server or globally, one page at a time.
     """
     view = View()
+    # cursors[page] is the keyset cursor that page starts after
+    state = {"type": "server", "page": 0, "cursors": [None]}
 
-    async def gather_leaderboard_data(leaderboard_type: str, guild_id: int = None) -> discord.Embed:
+    async def gather_leaderboard_data(leaderboard_type: str, guild_id: int, page: int) -> discord.Embed:
         embed = discord.Embed(color=discord.Color.blue())
         
         leaderboard_data = {
             "server": {
                 "title": "Dogs Leaderboard (Server)",
                 "footer": "Server Leaderboard",
-                "data": db.get_leaderboard(guild_id)
+                "guild_id": guild_id,
+                "min_total": 1
             },
             "global": {
                 "title": "Dogs Leaderboard (Global)",
                 "footer": "Global Leaderboard",
-                "data": await get_global_leaderboard()
+                "guild_id": None,
+                "min_total": 20
             }
         }
         
         data = leaderboard_data[leaderboard_type]
-        rarest_dog, top_users = data["data"]
+        cursors = state["cursors"]
+        rarest_dog, top_users = await db.get_leaderboard_page(
+            data["guild_id"], cursors[page], LEADERBOARD_PAGE_SIZE, data["min_total"]
+        )
+        if page == 0:
+            state["rarest_dog"] = rarest_dog
+        rarest_dog = state.get("rarest_dog")
+
+        # A full page means there may be another one after it
+        if len(top_users) == LEADERBOARD_PAGE_SIZE and len(cursors) == page + 1:
+            last_user, last_total = top_users[-1]
+            cursors.append((last_total, last_user))
         
         embed.title = data["title"]
         embed.description = f"Rarest dog: {rarest_dog[0]} ({rarest_dog[1]} exist)" if rarest_dog else ""
-        embed.set_footer(text=data["footer"])
+        embed.set_footer(text=f"{data['footer']} • Page {page + 1}")
         
         if top_users:
-            for index, (user_id, total_amount) in enumerate(top_users[:25]):
+            for index, (user_id, total_amount) in enumerate(top_users, start=page * LEADERBOARD_PAGE_SIZE):
                 embed.add_field(
                     name=f"{index+1}.",
                     value=f"{total_amount:,} dogs: <@{user_id}>",
@@ -877,147 +603,146 @@ async def leaderboard_command(interaction: discord.Interaction):
                 )
         else:
             embed.add_field(name="No users found", value="No data available.", inline=False)
+
+        previous_button.disabled = page == 0
+        next_button.disabled = len(cursors) <= page + 1
         
         return embed
 
-    async def get_global_leaderboard():
-        all_top_users = {}
-        rarest_dog = None
-
-        for guild in bot.guilds:
-            guild_rarest_dog, guild_top_users = db.get_leaderboard(guild.id)
-
-            if guild_rarest_dog:
-                if rarest_dog is None or guild_rarest_dog[1] < rarest_dog[1]:
-                    rarest_dog = guild_rarest_dog
-
-            for user_id, amount in guild_top_users:
-                all_top_users[user_id] = all_top_users.get(user_id, 0) + amount
-
-        top_users = [(user_id, amount) for user_id, amount in all_top_users.items() if amount >= 20]
-        top_users.sort(key=lambda x: x[1], reverse=True)
-
-        return {}, top_users
-
     # Button callbacks
     async def leaderboard_callback(interaction: discord.Interaction, leaderboard_type: str):
         await interaction.response.defer()
-        embed = await gather_leaderboard_data(leaderboard_type, interaction.guild.id)
-        await interaction.edit_original_response(embed=embed)
+        state.update(type=leaderboard_type, page=0, cursors=[None])
+        embed = await gather_leaderboard_data(leaderboard_type, interaction.guild.id, 0)
+        await interaction.edit_original_response(embed=embed, view=view)
+
+    async def page_callback(interaction: discord.Interaction, step: int):
+        await interaction.response.defer()
+        state["page"] = max(0, min(state["page"] + step, len(state["cursors"]) - 1))
+        embed = await gather_leaderboard_data(state["type"], interaction.guild.id, state["page"])
+        await interaction.edit_original_response(embed=embed, view=view)
 
     # Create buttons
     server_button = Button(label="Server", style=discord.ButtonStyle.primary)
     global_button = Button(label="Global", style=discord.ButtonStyle.primary)
+    previous_button = Button(label="◀", style=discord.ButtonStyle.secondary)
+    next_button = Button(label="▶", style=discord.ButtonStyle.secondary)
 
     server_button.callback = lambda i: leaderboard_callback(i, "server")
     global_button.callback = lambda i: leaderboard_callback(i, "global")
+    previous_button.callback = lambda i: page_callback(i, -1)
+    next_button.callback = lambda i: page_callback(i, 1)
 
     view.add_item(server_button)
     view.add_item(global_button)
+    view.add_item(previous_button)
+    view.add_item(next_button)
 
-    embed = await gather_leaderboard_data("server", interaction.guild.id)
+    embed = await gather_leaderboard_data("server", interaction.guild.id, 0)
     await interaction.response.send_message(embed=embed, view=view)
 
 
+# info embed never changes, so it is built once
+info_embed = discord.Embed(
+    title="DogBot",
+    description=("[Discord Server](https://discord.gg/7yv7DEz9a5)\n"
+                 "[Github Page](https://github.com/NotRealAz/DogBot)\n\n"
+                 "Dog bot adds Dog catching, silly commands, and more fun features!\n\n"
+                 "List of features:"),
+    color=discord.Color(0xFFA500)
+)
+
+# Add fields
+info_embed.add_field(
+    name="Dog Hunting",
+    value=("Many dog types such as Mutt, Husky, Dalmatian, and more!\n"
+           "To catch them, type 'dog' when it spawns in a catching channel."),
+    inline=True
+)
+
+info_embed.add_field(
+    name="Commands",
+    value="Silly commands for all your silly needs!",
+    inline=True
+)
+
+info_embed.add_field(
+    name="DogBoard (DogStand exclusive)",
+    value=("Messages with 5 <:staring_dog:1285440635117113344> reactions "
+           "would appear in the dog board to see all of the horrendous or funny stuff people say."),
+    inline=True
+)
+
+# Set footer and thumbnail
+info_embed.set_footer(
+    text="Dog Bot by notrealaz, Dog Stand by meo.isnt.mayo",
+    icon_url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
+)
+
+info_embed.set_thumbnail(
+    url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
+)
+
 # info commmand. shows info about dogbot
 @bot.tree.command(name="info", description="Shows info about DogBot.")
 async def info_command(interaction: discord.Interaction):
     
     """Shows info about DogBot."""
     
-    embed = discord.Embed(
-        title="DogBot",
-        description=("[Discord Server](https://discord.gg/7yv7DEz9a5)\n"
-                     "[Github Page](https://github.com/NotRealAz/DogBot)\n\n"
-                     "Dog bot adds Dog catching, silly commands, and more fun features!\n\n"
-                     "List of features:"),
-        color=discord.Color(0xFFA500)
-    )
-    
-    # Add fields
-    embed.add_field(
-        name="Dog Hunting",
-        value=("Many dog types such as Mutt, Husky, Dalmatian, and more!\n"
-               "To catch them, type 'dog' when it spawns in a catching channel."),
-        inline=True
-    )
-    
-    embed.add_field(
-        name="Commands",
-        value="Silly commands for all your silly needs!",
-        inline=True
-    )
-    
-    embed.add_field(
-        name="DogBoard (DogStand exclusive)",
-        value=("Messages with 5 <:staring_dog:1285440635117113344> reactions "
-               "would appear in the dog board to see all of the horrendous or funny stuff people say."),
-        inline=True
-    )
-    
-    # Set footer and thumbnail
-    embed.set_footer(
-        text="Dog Bot by notrealaz, Dog Stand by meo.isnt.mayo",
-        icon_url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
-    )
-    
-    embed.set_thumbnail(
-        url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
-    )
-    
     try:
-        await interaction.response.send_message(embed=embed)
+        await interaction.response.send_message(embed=info_embed)
     except discord.errors.NotFound:
         await interaction.response.send_message("Failed to send the help message.", ephemeral=True)
 
+# help embeds never change, so they are built once
+help_embed1 = discord.Embed(
+    title="How to Setup",
+    description=("To set up catching, you need to use the `/setup` command on a channel that you want dogs to spawn in, after you run the command dogs will start spawning there every 1/5 minutes."),
+    color=discord.Color(0xFFA500) 
+)
+
+help_embed1.set_thumbnail(url="https://raw.githubusercontent.com/NotRealAz/DogBot/refs/heads/main/media/dogs/mutt.png")
+
+# Second Embed: "How to Play"
+help_embed2 = discord.Embed(
+    title="How to Play",
+    color=discord.Color(0xFFA500)
+)
+
+help_embed2.add_field(
+    name="Catching Dogs",
+    value=("From time to time, dogs will spawn.\n\n"
+           "To catch them, you must say `dog`. (If you can't catch the dog, "
+           "then it's glitched and doesn't count). The dog will then be added to your inventory."),
+    inline=True
+)
+
+help_embed2.add_field(
+    name="Viewing Your Inventory",
+    value=("You can view your inventory using the `/inventory` command. "
+           "It will display all the dogs you own, including the amount and type."),
+    inline=True
+)
+
+help_embed2.add_field(
+    name="Silly Commands",
+    value="Little silly commands to make DogBot more fun.",
+    inline=True
+)
+
+help_embed2.set_footer(
+    text="Dog Bot by notrealaz, Dog stand by meo.isnt.mayo",
+    icon_url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
+)
+
 # help commmand. shows how to use dogbot
 @bot.tree.command(name="help", description="Shows how to use DogBot.")
 async def help_command(interaction: discord.Interaction):
     
     """Shows how to use DogBot."""
     
-    embed1 = discord.Embed(
-        title="How to Setup",
-        description=("To set up catching, you need to use the `/setup` command on a channel that you want dogs to spawn in, after you run the command dogs will start spawning there every 1/5 minutes."),
-        color=discord.Color(0xFFA500) 
-    )
-
-    embed1.set_thumbnail(url="https://raw.githubusercontent.com/NotRealAz/DogBot/refs/heads/main/media/dogs/mutt.png")
-    
-    # Second Embed: "How to Play"
-    embed2 = discord.Embed(
-        title="How to Play",
-        color=discord.Color(0xFFA500)
-    )
-
-    embed2.add_field(
-        name="Catching Dogs",
-        value=("From time to time, dogs will spawn.\n\n"
-               "To catch them, you must say `dog`. (If you can't catch the dog, "
-               "then it's glitched and doesn't count). The dog will then be added to your inventory."),
-        inline=True
-    )
-    
-    embed2.add_field(
-        name="Viewing Your Inventory",
-        value=("You can view your inventory using the `/inventory` command. "
-               "It will display all the dogs you own, including the amount and type."),
-        inline=True
-    )
-    
-    embed2.add_field(
-        name="Silly Commands",
-        value="Little silly commands to make DogBot more fun.",
-        inline=True
-    )
-    
-    embed2.set_footer(
-        text="Dog Bot by notrealaz, Dog stand by meo.isnt.mayo",
-        icon_url="https://github.com/NotRealAz/DogBot/blob/main/media/dogs/mutt.png?raw=true"
-    )
-
     try:
-        await interaction.response.send_message(embeds=[embed1, embed2])
+        await interaction.response.send_message(embeds=[help_embed1, help_embed2])
     except discord.errors.NotFound:
         await interaction.response.send_message("Failed to send the help message.", ephemeral=True)
 
@@ -1039,9 +764,9 @@ async def setup(interaction: discord.Interaction):
     guild_id = interaction.guild.id
 
     try:
-        server_channels = db.list_server_channels(guild_id)
+        server_channels = await db.list_server_channels(guild_id)
         if channel_id not in server_channels:
-            db.add_channel(channel_id, guild_id)
+            await db.add_channel(channel_id, guild_id)
             await interaction.response.send_message(f"The channel {interaction.channel.name} has been set up for catching!", ephemeral=True)
         else:
             button = Button(label="Remove", style=discord.ButtonStyle.danger, custom_id="remove_channel")
@@ -1049,7 +774,7 @@ async def setup(interaction: discord.Interaction):
             view.add_item(button)
             
             async def remove_channel_callback(interaction: discord.Interaction):
-                db.remove_channel(channel_id, guild_id)
+                await db.remove_channel(channel_id, guild_id)
                 await interaction.response.edit_message(content=f"The channel {interaction.channel.mention} has been removed from the catching channels.", view=None)
             
             button.callback = remove_channel_callback
@@ -1080,7 +805,7 @@ async def battle_command(interaction: discord.Interaction, opponent: discord.Use
     guild_id = interaction.guild.id 
 
     # Check user's inventory for the selected dog
-    dogs = db.list_dogs(user_id, guild_id)
+    dogs = await db.list_dogs(user_id, guild_id)
     user_dog = next((dog for dog in dogs if dog[0] == dog_name), None)
 
     if user_dog is None:
@@ -1111,7 +836,7 @@ async def battle_command(interaction: discord.Interaction, opponent: discord.Use
             opponent_dog_name = msg.content
 
             # Check if the opponent owns the dog they specified
-            opponent_dogs = db.list_dogs(opponent.id, guild_id)
+            opponent_dogs = await db.list_dogs(opponent.id, guild_id)
             opponent_dog = next((dog for dog in opponent_dogs if dog[0] == opponent_dog_name), None)
 
             if opponent_dog is not None:
@@ -1132,9 +857,11 @@ async def battle_command(interaction: discord.Interaction, opponent: discord.Use
     winner = random.choice([interaction.user, opponent])
     await interaction.channel.send(f"Winner: {winner.name}!")
 
-token = os.getenv("BOT_TOKEN")
-if not token:
-    raise EnvironmentError("BOT_TOKEN is not set in the environment.")
+# Only when run as a script, so the handlers above can be imported (see benchmarks/suite.py)
+if __name__ == "__main__":
+    token = os.getenv("BOT_TOKEN")
+    if not token:
+        raise EnvironmentError("BOT_TOKEN is not set in the environment.")
 
-# Run the bot with the token
-bot.run(token)
+    # Run the bot with the token
+    bot.run(token)
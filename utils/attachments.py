@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from urllib.parse import urlparse, parse_qs
+
+import discord
+
+from utils.metrics import metrics
+
+class AttachmentCache:
+    """
+    Uploads every image once to an asset channel and embeds its CDN URL in later sends.
+
+    Discord deletes an attachment together with its message, so URLs are only reused
+    when they live in an asset channel whose messages are never deleted. Without one,
+    every send uploads the image again: a URL hosted on a spawn message would break
+    every other message embedding it once that spawn is caught.
+
+    Discord also signs CDN URLs with an expiry ("ex" query parameter), so an entry is
+    dropped when its message is deleted, when the URL is about to expire, or when a
+    send using it fails. Every miss falls back to a fresh upload, shared by every send
+    of that image that misses while it runs.
+    """
+
+    def __init__(self, asset_channel=None, expiry_margin: float = 3600, make_file=None, make_embed=None):
+        """
+        Args:
+            asset_channel: Optional channel whose messages are never deleted, used to host uploads.
+                URLs are only reused while it is set.
+            expiry_margin: Seconds before a signed URL expires at which it is no longer used.
+            make_file: Builds the upload for a path, defaults to discord.File.
+            make_embed: Builds an embed showing an image URL, defaults to a discord.Embed.
+        """
+        self.asset_channel = asset_channel
+        self.expiry_margin = expiry_margin
+        self.make_file = make_file or (lambda path: discord.File(path, filename=os.path.basename(path)))
+        self.make_embed = make_embed or self._embed
+        self.urls = {}  # path -> CDN URL
+        self.hosts = {}  # message_id -> path whose URL lives on that message
+        self.uploads = {}  # path -> task uploading it to the asset channel
+
+    @staticmethod
+    def _embed(url: str):
+        embed = discord.Embed()
+        embed.set_image(url=url)
+        return embed
+
+    def _expired(self, url: str) -> bool:
+        expires = parse_qs(urlparse(url).query).get("ex")
+        if not expires:
+            return False
+        try:
+            return int(expires[0], 16) - self.expiry_margin <= time.time()
+        except ValueError:
+            return True
+
+    def invalidate(self, path: str):
+        """
+        Forgets the cached URL of a path.
+        """
+        self.urls.pop(path, None)
+        self.hosts = {message_id: host for message_id, host in self.hosts.items() if host != path}
+
+    def message_deleted(self, message_id: int):
+        """
+        Drops the URL that was hosted on a deleted message, if any.
+        """
+        path = self.hosts.pop(message_id, None)
+        if path is not None:
+            self.urls.pop(path, None)
+
+    def _remember(self, path: str, message):
+        if message.attachments:
+            self.urls[path] = message.attachments[0].url
+            self.hosts[message.id] = path
+
+    async def _upload(self, path: str):
+        metrics.incr("attachment_uploads")
+        try:
+            self._remember(path, await self.asset_channel.send(file=self.make_file(path)))
+        except discord.HTTPException as e:
+            print(f"Error uploading {path} to the asset channel: {e}")
+
+    def _upload_done(self, path: str, task):
+        if self.uploads.get(path) is task:
+            del self.uploads[path]
+
+    async def send(self, channel, path: str, content: str = None):
+        """
+        Sends content with the image at path, embedding a cached URL when possible.
+        """
+        if self.asset_channel is None:
+            metrics.incr("attachment_misses")
+            return await channel.send(content, file=self.make_file(path))
+
+        url = self.urls.get(path)
+        if url is not None and self._expired(url):
+            self.invalidate(path)
+            url = None
+
+        if url is not None:
+            try:
+                message = await channel.send(content, embed=self.make_embed(url))
+                metrics.incr("attachment_hits")
+                return message
+            except discord.HTTPException as e:
+                print(f"Cached attachment for {path} failed, uploading again: {e}")
+                self.invalidate(path)
+
+        metrics.incr("attachment_misses")
+        upload = self.uploads.get(path)
+        if upload is None:
+            upload = self.uploads[path] = asyncio.create_task(self._upload(path))
+            upload.add_done_callback(lambda task: self._upload_done(path, task))
+        # Shielded so a spawn timing out doesn't cancel the upload other sends wait for
+        await asyncio.shield(upload)
+        if path in self.urls:
+            return await channel.send(content, embed=self.make_embed(self.urls[path]))
+        return await channel.send(content, file=self.make_file(path))
@@ -0,0 +1,72 @@
+import sqlite3
+import os
+import queue
+from contextlib import contextmanager
+
+class ConnectionManager:
+    def __init__(self, path: str, readers: int = 4, journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 busy_timeout: int = 5000, mmap_size: int = 256 * 1024 * 1024):
+        """
+        Opens one writer connection and a pool of read-only connections to the same sqlite file.
+
+        In WAL mode readers work from a snapshot and never block the writer, so long
+        leaderboard scans can run while catches are being committed.
+
+        Args:
+            path: Path of the sqlite database file.
+            readers: Number of read-only connections in the pool.
+            journal_mode: sqlite journal mode, WAL unless there is a reason not to.
+            synchronous: sqlite synchronous level. NORMAL is durable across crashes in WAL mode.
+            busy_timeout: Milliseconds to wait for a lock before raising "database is locked".
+            mmap_size: Bytes of the file to memory map for reads, 0 disables it.
+        """
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        self.path = path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        self.mmap_size = mmap_size
+
+        # Connections are handed to executor threads, so they can't be tied to the creating thread
+        self.writer = sqlite3.connect(path, check_same_thread=False)
+        # busy_timeout first, another process may hold the lock switching the journal mode needs
+        self._configure(self.writer)
+        self.writer.execute(f"PRAGMA journal_mode={journal_mode}")
+
+        self.readers = queue.Queue()
+        self.reader_count = readers
+        for _ in range(readers):
+            self.readers.put(self._open_reader())
+
+    def _configure(self, conn):
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+
+    def _open_reader(self):
+        conn = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True, check_same_thread=False)
+        self._configure(conn)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """
+        Borrows a read-only connection from the pool, blocking until one is free.
+        """
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+
+    def close(self):
+        """
+        Closes the writer and every pooled reader.
+        """
+        for _ in range(self.reader_count):
+            self.readers.get().close()
+        self.reader_count = 0
+        self.writer.close()
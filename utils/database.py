@@ -1,82 +1,525 @@
 import sqlite3
 import os
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.connection import ConnectionManager
+from utils.migrations import Batched, migrate
+from utils.shards import shard_for
+
+# UPDATE/INSERT ... RETURNING needs sqlite 3.35 or newer
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Totals kept up to date from the dogs table by triggers: table -> key columns
+AGGREGATES = {
+    "guild_user_totals": ("guild_id", "user_id"),
+    "guild_type_totals": ("guild_id", "type_id"),
+    "user_totals": ("user_id",),
+    "type_totals": ("type_id",),
+}
+
+# The totals as first shipped, keyed by the TEXT columns of the old dogs table
+TEXT_AGGREGATES = {
+    "guild_user_totals": ("guild_id", "user_id"),
+    "guild_type_totals": ("guild_id", "type"),
+    "user_totals": ("user_id",),
+    "type_totals": ("type",),
+}
+
+# The least caught dog type of a totals table, by name
+RAREST_TYPE = """SELECT dog_types.name, total FROM {table} JOIN dog_types ON dog_types.id = type_id
+                 WHERE {scope}total > 0 ORDER BY total ASC LIMIT 1"""
+
+# Milliseconds between the Unix epoch and the Discord epoch, the start of every snowflake timestamp
+DISCORD_EPOCH = 1420070400000
+
+def snowflake_at(timestamp: float) -> int:
+    """
+    Returns the smallest snowflake created at a Unix timestamp, in seconds.
+    """
+    return max(0, int(timestamp * 1000) - DISCORD_EPOCH) << 22
+
+# Rows copied per transaction when a migration rewrites the dogs table
+MIGRATION_BATCH = 20000
+
+class ChannelRegistry:
+    """
+    In-memory copy of the server_channels table.
+
+    Loaded once at startup and kept up to date by the DB channel methods, so
+    spawn ticks can read it without touching sqlite. version changes with every
+    change, so a reader can tell when it needs to look again.
+    """
+
+    def __init__(self, rows=()):
+        self.lock = threading.Lock()
+        self.guilds = {}  # guild_id -> set of channel_ids
+        self.version = 0
+        for channel_id, guild_id in rows:
+            self.add(channel_id, guild_id)
+
+    def add(self, channel_id: int, guild_id: int):
+        with self.lock:
+            self.guilds.setdefault(int(guild_id), set()).add(channel_id)
+            self.version += 1
+
+    def remove(self, channel_id: int, guild_id: int):
+        with self.lock:
+            channels = self.guilds.get(int(guild_id))
+            if channels is not None:
+                channels.discard(channel_id)
+                if not channels:
+                    del self.guilds[int(guild_id)]
+                self.version += 1
+
+    def clear(self, guild_id: int):
+        with self.lock:
+            self.guilds.pop(int(guild_id), None)
+            self.version += 1
+
+    def list(self, guild_id: int):
+        """
+        Returns the spawn channels of a guild.
+        """
+        with self.lock:
+            return list(self.guilds.get(int(guild_id), ()))
+
+    def items(self, shard_id: int = None, shard_count: int = 1):
+        """
+        Returns every configured (guild_id, channel_id) pair, or only those of one shard.
+        """
+        with self.lock:
+            return [(guild_id, channel_id) for guild_id, channels in self.guilds.items()
+                    if shard_id is None or shard_for(guild_id, shard_count) == shard_id
+                    for channel_id in channels]
 
 class DB:
-    def __init__(self):
+    def __init__(self, path: str = os.path.join('databases', 'database.db'), **options):
         """
         Initializes the database by creating the tables if they don't exist already.
+
+        Extra keyword arguments (readers, journal_mode, synchronous, busy_timeout, mmap_size)
+        are passed to the ConnectionManager.
         """
-        databases_folder = 'databases'
-        if not os.path.exists(databases_folder):
-            os.makedirs(databases_folder)
-        self.conn = sqlite3.connect(os.path.join(databases_folder, 'database.db'))
+        self.manager = ConnectionManager(path, **options)
+        # All writes go through the single writer connection
+        self.conn = self.manager.writer
+        # Twice the transactions committed by apply_catches, odd while one is being written.
+        # Lets AsyncDB tell which batches a read saw, see read_batches.
+        self.batch_clock = 0
         
         self.create_tables()
+        self.type_ids = {}
+        self.type_names = {}
+        self._load_types(self.conn)
+        self.channels = ChannelRegistry(self.conn.execute("SELECT channel_id, guild_id FROM server_channels"))
 
     def create_tables(self):
         """
-        Creates the tables needed for the database.
+        Creates or upgrades the tables needed for the database.
+        Append new migrations to the end of the list, never reorder or edit shipped ones.
         """
-        with self.conn:
-            self.conn.execute('''CREATE TABLE IF NOT EXISTS dogs (
-                type TEXT NOT NULL,
-                amount INTEGER NOT NULL,
-                user_id TEXT NOT NULL,
-                guild_id TEXT NOT NULL,
-                PRIMARY KEY (type, user_id, guild_id)
-            );''')
-            self.conn.execute('''CREATE TABLE IF NOT EXISTS server_channels (
-                channel_id INTEGER NOT NULL,
-                guild_id TEXT NOT NULL,
-                PRIMARY KEY (channel_id, guild_id)
-            );''')
+        migrate(self.conn, [
+            self.create_base_tables,  # 1
+            self.create_text_aggregates,  # 2
+            self.create_indexes,      # 3
+            Batched(self.prepare_integer_keys, self.copy_integer_keys, self.finish_integer_keys),  # 4
+            self.create_achievements,  # 5
+            self.create_dogboard_posts,  # 6
+        ])
+
+    @staticmethod
+    def create_base_tables(conn):
+        """
+        Creates the tables the bot started with.
+        """
+        conn.execute('''CREATE TABLE IF NOT EXISTS dogs (
+            type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            user_id TEXT NOT NULL,
+            guild_id TEXT NOT NULL,
+            PRIMARY KEY (type, user_id, guild_id)
+        );''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS server_channels (
+            channel_id INTEGER NOT NULL,
+            guild_id TEXT NOT NULL,
+            PRIMARY KEY (channel_id, guild_id)
+        );''')
+
+    @staticmethod
+    def create_aggregates(conn, aggregates=AGGREGATES, key_type="INTEGER"):
+        """
+        Creates the leaderboard totals and the triggers that maintain them.
+        Totals are filled from the dogs table the first time they are created.
+        """
+        for table, keys in aggregates.items():
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            columns = ", ".join(keys)
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                {", ".join(f"{key} {key_type} NOT NULL" for key in keys)},
+                total INTEGER NOT NULL,
+                PRIMARY KEY ({columns})
+            )""")
+            # Top-K reads and keyset pages walk this index, the leading keys narrow it to one guild
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_rank ON {table} ({', '.join(keys[:-1] + ('total', keys[-1]))})")
+            if not exists:
+                conn.execute(f"INSERT INTO {table} ({columns}, total) SELECT {columns}, SUM(amount) FROM dogs GROUP BY {columns}")
+
+            for event, delta, row in [("INSERT", "NEW.amount", "NEW"), ("DELETE", "-OLD.amount", "OLD"),
+                                      ("UPDATE OF amount", "NEW.amount - OLD.amount", "NEW")]:
+                name = f"{table}_{event.split()[0].lower()}"
+                values = ", ".join(f"{row}.{key}" for key in keys)
+                # The dogs primary key is never updated, so an UPDATE only moves the amount
+                conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON dogs BEGIN
+                    INSERT INTO {table} ({columns}, total) VALUES ({values}, {delta})
+                    ON CONFLICT ({columns}) DO UPDATE SET total = total + excluded.total;
+                END""")
+
+    @classmethod
+    def create_text_aggregates(cls, conn):
+        """
+        Creates the totals keyed by the TEXT columns of the original dogs table.
+        """
+        cls.create_aggregates(conn, TEXT_AGGREGATES, "TEXT")
+
+    @staticmethod
+    def create_indexes(conn):
+        """
+        Adds covering indexes for the queries the primary keys can't serve.
+        """
+        # list_dogs filters by user and guild and reads type and amount
+        conn.execute("CREATE INDEX IF NOT EXISTS dogs_by_user ON dogs (user_id, guild_id, type, amount)")
+        # clear_server_channels deletes by guild
+        conn.execute("CREATE INDEX IF NOT EXISTS server_channels_by_guild ON server_channels (guild_id)")
+
+    @staticmethod
+    def prepare_integer_keys(conn):
+        """
+        First step of moving dogs to integer keys: creates dog_types and the new table,
+        and mirrors every write to the old table into it while the rows are copied.
+        """
+        conn.execute("""CREATE TABLE IF NOT EXISTS dog_types (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )""")
+        # Clustered on the key list_dogs and every point lookup start with
+        conn.execute("""CREATE TABLE IF NOT EXISTS dogs_new (
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            type_id INTEGER NOT NULL REFERENCES dog_types (id),
+            amount INTEGER NOT NULL,
+            PRIMARY KEY (user_id, guild_id, type_id)
+        ) WITHOUT ROWID""")
+
+        type_id = "(SELECT id FROM dog_types WHERE name = {}.type)"
+        for event, row in [("INSERT", "NEW"), ("UPDATE", "NEW")]:
+            conn.execute(f"""CREATE TRIGGER IF NOT EXISTS dogs_copy_{event.lower()} AFTER {event} ON dogs BEGIN
+                INSERT OR IGNORE INTO dog_types (name) VALUES ({row}.type);
+                INSERT INTO dogs_new (user_id, guild_id, type_id, amount)
+                VALUES (CAST({row}.user_id AS INTEGER), CAST({row}.guild_id AS INTEGER), {type_id.format(row)}, {row}.amount)
+                ON CONFLICT (user_id, guild_id, type_id) DO UPDATE SET amount = excluded.amount;
+            END""")
+        conn.execute(f"""CREATE TRIGGER IF NOT EXISTS dogs_copy_delete AFTER DELETE ON dogs BEGIN
+            DELETE FROM dogs_new WHERE user_id = CAST(OLD.user_id AS INTEGER)
+                AND guild_id = CAST(OLD.guild_id AS INTEGER) AND type_id = {type_id.format("OLD")};
+        END""")
+
+    @staticmethod
+    def copy_integer_keys(conn, position):
+        """
+        Copies the old dogs rows with rowid in (position, position + MIGRATION_BATCH].
+        Returns where the next batch starts, or None once every row is copied.
+        """
+        end = position + MIGRATION_BATCH
+        conn.execute(
+            "INSERT OR IGNORE INTO dog_types (name) SELECT DISTINCT type FROM dogs WHERE rowid > ? AND rowid <= ?",
+            (position, end)
+        )
+        # Copies the current value, so rows the mirror triggers already wrote stay correct
+        conn.execute(
+            """INSERT INTO dogs_new (user_id, guild_id, type_id, amount)
+               SELECT CAST(dogs.user_id AS INTEGER), CAST(dogs.guild_id AS INTEGER), dog_types.id, dogs.amount
+               FROM dogs JOIN dog_types ON dog_types.name = dogs.type
+               WHERE dogs.rowid > ? AND dogs.rowid <= ?
+               ON CONFLICT (user_id, guild_id, type_id) DO UPDATE SET amount = excluded.amount""",
+            (position, end)
+        )
+        last = conn.execute("SELECT MAX(rowid) FROM dogs").fetchone()[0]
+        return end if last is not None and end < last else None
+
+    def finish_integer_keys(self, conn):
+        """
+        Swaps the copied table in and rebuilds the totals and server_channels with integer keys.
+        """
+        for table in TEXT_AGGREGATES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        # Takes the old triggers and indexes with it
+        conn.execute("DROP TABLE dogs")
+        conn.execute("ALTER TABLE dogs_new RENAME TO dogs")
+        self.create_aggregates(conn)
+
+        conn.execute("""CREATE TABLE server_channels_new (
+            channel_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            PRIMARY KEY (channel_id, guild_id)
+        )""")
+        conn.execute("INSERT INTO server_channels_new SELECT channel_id, CAST(guild_id AS INTEGER) FROM server_channels")
+        conn.execute("DROP TABLE server_channels")
+        conn.execute("ALTER TABLE server_channels_new RENAME TO server_channels")
+        conn.execute("CREATE INDEX server_channels_by_guild ON server_channels (guild_id)")
+
+    def create_achievements(self, conn):
+        """
+        Moves achievements into this database, so a catch and its achievements commit together.
+        Claims are copied from the old databases/ach.db next to this file if it exists, which is left in place.
+        """
+        conn.execute("""CREATE TABLE IF NOT EXISTS achievements (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            achievement_id TEXT NOT NULL,
+            PRIMARY KEY (guild_id, user_id, achievement_id)
+        ) WITHOUT ROWID""")
+
+        legacy = os.path.join(os.path.dirname(os.path.abspath(self.manager.path)), "ach.db")
+        if os.path.exists(legacy):
+            # ATTACH isn't allowed inside the migration transaction, so read it on the side.
+            # Not opened with mode=ro, which can't read a WAL database whose -shm file is gone.
+            source = sqlite3.connect(legacy)
+            try:
+                source.execute("PRAGMA query_only = ON")
+                rows = source.execute("SELECT GID, UID, ID FROM achievements").fetchall()
+            except sqlite3.OperationalError as e:
+                # Any other error (a locked or unreadable file) aborts the migration, so it's retried
+                # on the next start instead of being recorded as done without the old claims
+                if "no such table" not in str(e):
+                    raise
+                rows = []
+            finally:
+                source.close()
+            conn.executemany("INSERT OR IGNORE INTO achievements VALUES (?, ?, ?)", rows)
+
+    def create_dogboard_posts(self, conn):
+        """
+        Creates the set of messages already posted to the DogBoard, replacing databases/processed_ids.json.
+        IDs in the old file next to this database are copied once, the file is left in place.
+        """
+        # The message ID is the rowid, and snowflakes grow with time, so pruning by age is a range delete
+        conn.execute("CREATE TABLE IF NOT EXISTS dogboard_posts (message_id INTEGER PRIMARY KEY)")
+
+        legacy = os.path.join(os.path.dirname(os.path.abspath(self.manager.path)), "processed_ids.json")
+        if os.path.exists(legacy):
+            try:
+                with open(legacy) as f:
+                    ids = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading {legacy}, DogBoard history not migrated: {e}")
+                ids = []
+            if isinstance(ids, list):
+                conn.executemany("INSERT OR IGNORE INTO dogboard_posts VALUES (?)", ((int(i),) for i in ids))
+
+    def _load_types(self, conn):
+        """
+        Reads dog_types into the name/id maps. Called at startup and whenever an unknown type
+        turns up, which happens when another process sharing the database added it.
+        """
+        for name, type_id in conn.execute("SELECT name, id FROM dog_types"):
+            self.type_names[type_id] = name
+            self.type_ids[name] = type_id
+
+    def _type_id(self, name):
+        """
+        Returns the dog_types id of a dog type, adding the type if it's new.
+        New types are committed on their own, so a rolled back write can't leave a stale id cached.
+        """
+        type_id = self.type_ids.get(name)
+        if type_id is None:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO dog_types (name) VALUES (?)", (name,))
+                type_id = self.conn.execute("SELECT id FROM dog_types WHERE name = ?", (name,)).fetchone()[0]
+            self.type_names[type_id] = name
+            self.type_ids[name] = type_id
+        return type_id
 
     def add_dog(self, type, user_id, guild_id, amount=1):
         """
         Adds a dog to the user's inventory or updates the amount if the dog already exists.
         Uses ON CONFLICT to avoid separate INSERT and UPDATE queries.
+        Returns the amount of that dog the user has afterwards.
         """
+        upsert = """INSERT INTO dogs (user_id, guild_id, type_id, amount) 
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, guild_id, type_id) 
+                    DO UPDATE SET amount = amount + ?"""
+        params = (user_id, guild_id, self._type_id(type), amount, amount)
         with self.conn:
-            cursor = self.conn.execute(
-                """INSERT INTO dogs (type, user_id, guild_id, amount) 
-                   VALUES (?, ?, ?, ?)
-                   ON CONFLICT(type, user_id, guild_id) 
-                   DO UPDATE SET amount = amount + ?""",
-                (type, user_id, guild_id, amount, amount)
-            )
-            return cursor.rowcount  # Return the number of affected rows
+            if HAS_RETURNING:
+                return self.conn.execute(upsert + " RETURNING amount", params).fetchone()[0]
+            self.conn.execute(upsert, params)
+            return self._get_amount(self.conn, type, user_id, guild_id)
 
     def remove_dog(self, type, user_id, guild_id, amount=1):
         """
-        Removes a dog from the user's inventory.
+        Removes dogs from the user's inventory if they have at least that many.
+        Returns the amount left afterwards, or None if they didn't have enough.
         """
+        type_id = self.type_ids.get(type)
+        if type_id is None:
+            self._load_types(self.conn)
+            type_id = self.type_ids.get(type)
+            if type_id is None:
+                return None
+        update = "UPDATE dogs SET amount = amount - ? WHERE user_id = ? AND guild_id = ? AND type_id = ? AND amount >= ?"
+        params = (amount, user_id, guild_id, type_id, amount)
         with self.conn:
-            # Update the amount of dogs, but only where amount > 0
-            cursor = self.conn.execute(
-                "UPDATE dogs SET amount = amount - ? WHERE type = ? AND user_id = ? AND guild_id = ? AND amount > 0",
-                (amount, type, user_id, guild_id)
+            # The amount check and the decrement happen in one statement
+            if HAS_RETURNING:
+                row = self.conn.execute(update + " RETURNING amount", params).fetchone()
+                if row is None:
+                    return None
+                remaining = row[0]
+            else:
+                if self.conn.execute(update, params).rowcount == 0:
+                    return None
+                remaining = self._get_amount(self.conn, type, user_id, guild_id)
+
+            if remaining == 0:
+                self.conn.execute(
+                    "DELETE FROM dogs WHERE user_id = ? AND guild_id = ? AND type_id = ? AND amount = 0",
+                    (user_id, guild_id, type_id)
+                )
+            return remaining
+
+    @staticmethod
+    def _get_amount(conn, type, user_id, guild_id):
+        row = conn.execute(
+            """SELECT amount FROM dogs
+               WHERE user_id = ? AND guild_id = ? AND type_id = (SELECT id FROM dog_types WHERE name = ?)""",
+            (user_id, guild_id, type)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_dog_amount(self, type, user_id, guild_id):
+        """
+        Returns how many dogs of one type a user has, 0 if none.
+        """
+        with self.manager.reader() as conn:
+            return self._get_amount(conn, type, user_id, guild_id)
+
+    def apply_dog_deltas(self, deltas):
+        """
+        Applies many (type, user_id, guild_id, delta) changes in a single transaction.
+        Rows that drop to zero or below are removed afterwards.
+        """
+        self.apply_catches(deltas, ())
+
+    def apply_catches(self, deltas, achievements):
+        """
+        Applies (type, user_id, guild_id, delta) dog changes and stores (guild_id, user_id, achievement_id)
+        claims in one transaction, so neither is written without the other.
+        """
+        rows = [(user_id, guild_id, self._type_id(type), delta) for type, user_id, guild_id, delta in deltas]
+        self.batch_clock += 1
+        try:
+            self._apply_catches(rows, achievements)
+        except Exception:
+            # Rolled back, so it doesn't count as a batch
+            self.batch_clock -= 1
+            raise
+        self.batch_clock += 1
+
+    def _apply_catches(self, rows, achievements):
+        with self.conn:
+            self.conn.executemany(
+                """INSERT INTO dogs (user_id, guild_id, type_id, amount)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(user_id, guild_id, type_id)
+                   DO UPDATE SET amount = amount + excluded.amount""",
+                rows
             )
-            
-            # Delete any rows where amount is now 0 after the update
-            self.conn.execute(
-                "DELETE FROM dogs WHERE type = ? AND user_id = ? AND guild_id = ? AND amount = 0",
-                (type, user_id, guild_id)
+            self.conn.executemany(
+                "DELETE FROM dogs WHERE user_id = ? AND guild_id = ? AND type_id = ? AND amount <= 0",
+                [(user_id, guild_id, type_id) for user_id, guild_id, type_id, delta in rows if delta < 0]
             )
+            self.conn.executemany("INSERT OR IGNORE INTO achievements VALUES (?, ?, ?)", achievements)
 
-            return cursor.rowcount
+    @property
+    def batches(self) -> int:
+        """
+        Number of apply_catches transactions committed.
+        """
+        return self.batch_clock // 2
+
+    def read_batches(self, func, *args):
+        """
+        Runs a single-query read and returns (batches, result), where batches is the number of
+        apply_catches transactions the read saw. Repeated if one was being written while it ran.
+        """
+        while True:
+            clock = self.batch_clock
+            if clock % 2 == 0:
+                result = func(*args)
+                if self.batch_clock == clock:
+                    return clock // 2, result
+            time.sleep(0.001)
         
     def list_dogs(self, user_id, guild_id):
         """
         Returns all dogs for a user in a guild.
         """
-        with self.conn:
-            cursor = self.conn.execute(
-                "SELECT type, amount FROM dogs WHERE user_id = ? AND guild_id = ?",
+        with self.manager.reader() as conn:
+            cursor = conn.execute(
+                "SELECT type_id, amount FROM dogs WHERE user_id = ? AND guild_id = ?",
                 (user_id, guild_id)
             )
-            result = cursor.fetchall()
-            return result if result else []  # Return an empty list if no dogs found
+            # Type names come from memory instead of a join, every id in dogs went through _type_id
+            rows = cursor.fetchall()
+            if any(type_id not in self.type_names for type_id, amount in rows):
+                self._load_types(conn)
+            return [(self.type_names[type_id], amount) for type_id, amount in rows]
         
+    def list_achievements(self, guild_id, user_id) -> set:
+        """
+        Returns the IDs of the achievements a user has claimed in a guild.
+        """
+        with self.manager.reader() as conn:
+            return {row[0] for row in conn.execute(
+                "SELECT achievement_id FROM achievements WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )}
+
+    def is_posted(self, message_id) -> bool:
+        """
+        Returns whether a message was already posted to the DogBoard.
+        """
+        with self.manager.reader() as conn:
+            return conn.execute("SELECT 1 FROM dogboard_posts WHERE message_id = ?", (message_id,)).fetchone() is not None
+
+    def mark_posted(self, message_id) -> bool:
+        """
+        Records a DogBoard post. Returns False if the message was already recorded.
+        """
+        with self.conn:
+            return self.conn.execute("INSERT OR IGNORE INTO dogboard_posts VALUES (?)", (message_id,)).rowcount == 1
+
+    def unmark_posted(self, message_id):
+        """
+        Forgets a DogBoard post, so a failed post can be tried again.
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM dogboard_posts WHERE message_id = ?", (message_id,))
+
+    def prune_posted(self, before: float) -> int:
+        """
+        Forgets DogBoard posts of messages sent before a Unix timestamp. Returns how many were removed.
+        """
+        with self.conn:
+            return self.conn.execute("DELETE FROM dogboard_posts WHERE message_id < ?", (snowflake_at(before),)).rowcount
+
     def get_leaderboard(self, guild_id):
         """
         
@@ -88,24 +531,22 @@ class DB:
         [ amount dogs: User_ID ]
 
         """
-        with self.conn:
-            cursor = self.conn.execute(
-                """SELECT type, SUM(amount) as total_amount 
-                FROM dogs 
-                WHERE guild_id = ? 
-                GROUP BY type 
-                ORDER BY total_amount ASC 
+        with self.manager.reader() as conn:
+            cursor = conn.execute(
+                """SELECT dog_types.name, total 
+                FROM guild_type_totals JOIN dog_types ON dog_types.id = type_id 
+                WHERE guild_id = ? AND total > 0 
+                ORDER BY total ASC 
                 LIMIT 1""",
                 (guild_id,)
             )
             rarest_dog = cursor.fetchone()  # ('dog_type', total_amount)
 
-            cursor = self.conn.execute(
-                """SELECT user_id, SUM(amount) as total_amount 
-                FROM dogs 
-                WHERE guild_id = ? 
-                GROUP BY user_id 
-                ORDER BY total_amount DESC 
+            cursor = conn.execute(
+                """SELECT user_id, total 
+                FROM guild_user_totals 
+                WHERE guild_id = ? AND total > 0 
+                ORDER BY total DESC 
                 LIMIT 15""",
                 (guild_id,)
             )
@@ -113,6 +554,55 @@ class DB:
             
         return rarest_dog, top_users
 
+    def get_leaderboard_page(self, guild_id=None, after=None, limit=15, min_total=1):
+        """
+        Returns one page of the ranking of users by dogs, using keyset pagination.
+
+        Args:
+            guild_id: The guild to rank, or None for the global ranking.
+            after: (total, user_id) of the last row of the previous page, None for the first page.
+            limit: Rows per page.
+            min_total: Users with fewer dogs are left out.
+
+        Returns:
+            (rarest_dog, rows). rarest_dog is only looked up for the first page and is None otherwise.
+        """
+        if guild_id is None:
+            table, scope, params = "user_totals", "", [min_total]
+            rarest = (RAREST_TYPE.format(table="type_totals", scope=""), ())
+        else:
+            table, scope, params = "guild_user_totals", "guild_id = ? AND ", [guild_id, min_total]
+            rarest = (RAREST_TYPE.format(table="guild_type_totals", scope="guild_id = ? AND "), (guild_id,))
+
+        query = f"SELECT user_id, total FROM {table} WHERE {scope}total >= ?"
+        if after is not None:
+            # Rows ranked after the cursor: fewer dogs, or as many dogs and a smaller user ID
+            query += " AND (total < ? OR (total = ? AND user_id < ?))"
+            params += [after[0], after[0], after[1]]
+        # Both descending, so the whole order comes from walking the rank index backwards
+        query += " ORDER BY total DESC, user_id DESC LIMIT ?"
+        params.append(limit)
+
+        with self.manager.reader() as conn:
+            rarest_dog = conn.execute(*rarest).fetchone() if after is None else None
+            rows = conn.execute(query, params).fetchall()
+
+        return rarest_dog, rows
+
+    def get_global_leaderboard(self, limit=25, min_total=20):
+        """
+        Returns the rarest dog across every guild and the top users by dogs across every guild.
+        Only users with at least min_total dogs are listed.
+        """
+        with self.manager.reader() as conn:
+            rarest_dog = conn.execute(RAREST_TYPE.format(table="type_totals", scope="")).fetchone()
+            top_users = conn.execute(
+                "SELECT user_id, total FROM user_totals WHERE total >= ? ORDER BY total DESC LIMIT ?",
+                (min_total, limit)
+            ).fetchall()
+
+        return rarest_dog, top_users
+
     def add_channel(self, channel_id: int, guild_id: int):
         with self.conn:
             cursor = self.conn.execute(
@@ -120,7 +610,8 @@ class DB:
                    VALUES (?, ?)""",
                 (channel_id, guild_id)
             )
-            return cursor.rowcount
+        self.channels.add(channel_id, guild_id)
+        return cursor.rowcount
 
 
     def remove_channel(self, channel_id, guild_id):
@@ -129,20 +620,19 @@ class DB:
                 "DELETE FROM server_channels WHERE channel_id = ? AND guild_id = ?",
                 (channel_id, guild_id)
             )
-            return cursor.rowcount
+        self.channels.remove(channel_id, guild_id)
+        return cursor.rowcount
 
     def list_server_channels(self, guild_id):
-        with self.conn:
-            cursor = self.conn.execute(
-                "SELECT channel_id FROM server_channels WHERE guild_id = ?",
-                (guild_id,)
-            )
-            result = cursor.fetchall()
-            return [row[0] for row in result]
+        """
+        Returns the spawn channels of a guild from the in-memory registry.
+        """
+        return self.channels.list(guild_id)
 
     def clear_server_channels(self, guild_id):
         with self.conn:
             self.conn.execute("DELETE FROM server_channels WHERE guild_id = ?", (guild_id,))
+        self.channels.clear(guild_id)
 
     def __enter__(self):
         """
@@ -152,12 +642,467 @@ class DB:
 
     def __exit__(self, exc_type, exc_value, traceback):
         """
-        Exit method for the context manager. Closes the connection.
+        Exit method for the context manager. Closes the connections.
         """
-        self.conn.close()
+        self.close()
+
+    def close(self):
+        """
+        Closes the writer and reader connections.
+        """
+        self.manager.close()
 
     def __del__(self):
         """
-        Ensures the database connection is closed when the DB instance is deleted.
+        Ensures the database connections are closed when the DB instance is deleted.
+        """
+        self.close()
+
+
+class CatchQueue:
+    """
+    Write-behind buffer for inventory changes.
+
+    Increments are merged per (type, user_id, guild_id) until the queue is flushed,
+    so a burst of catches costs one transaction instead of one per dog. Achievement
+    claims wait in the same queue and are written in the same transaction.
+    """
+
+    def __init__(self, max_pending: int = 500):
+        self.max_pending = max_pending
+        self.pending = {}
+        self.achievements = set()  # (guild_id, user_id, achievement_id)
+
+    @classmethod
+    def of(cls, deltas, achievements):
+        """
+        Builds a queue holding rows returned by take() and take_achievements().
+        """
+        queue = cls()
+        for type, user_id, guild_id, delta in deltas:
+            queue.pending[(type, user_id, guild_id)] = delta
+        queue.achievements.update(achievements)
+        return queue
+
+    def add(self, type, user_id, guild_id, amount: int) -> bool:
+        """
+        Queues a change. Returns True once the queue is big enough to be flushed.
+        """
+        key = (type, user_id, guild_id)
+        self.pending[key] = self.pending.get(key, 0) + amount
+        return len(self.pending) >= self.max_pending
+
+    def take(self):
+        """
+        Empties the queue and returns its rows as (type, user_id, guild_id, delta).
+        """
+        pending, self.pending = self.pending, {}
+        return [(*key, delta) for key, delta in pending.items() if delta != 0]
+
+    def claim(self, guild_id, user_id, achievement_id):
+        """
+        Queues an achievement claim.
+        """
+        self.achievements.add((guild_id, user_id, achievement_id))
+
+    def take_achievements(self):
+        """
+        Empties the queued claims and returns them as (guild_id, user_id, achievement_id).
+        """
+        achievements, self.achievements = self.achievements, set()
+        return list(achievements)
+
+    def claimed(self, guild_id, user_id) -> set:
+        """
+        Returns the queued achievement IDs of one user.
+        """
+        return {achievement_id for pending_guild, pending_user, achievement_id in self.achievements
+                if pending_guild == guild_id and pending_user == user_id}
+
+    def amount(self, type, user_id, guild_id) -> int:
+        """
+        Returns the queued change for one inventory row.
+        """
+        return self.pending.get((type, user_id, guild_id), 0)
+
+    def apply(self, dogs, user_id, guild_id):
+        """
+        Merges the queued changes of one user into a list_dogs() result.
+        """
+        amounts = dict(dogs)
+        for (type, pending_user, pending_guild), delta in self.pending.items():
+            if pending_user == user_id and pending_guild == guild_id:
+                amounts[type] = amounts.get(type, 0) + delta
+        return [(type, amount) for type, amount in amounts.items() if amount > 0]
+
+    def __len__(self):
+        return len(self.pending)
+
+
+class ClaimCache:
+    """
+    LRU cache of the achievement IDs each (guild, user) has claimed.
+
+    A user's set is loaded the first time it is needed and kept up to date by
+    AsyncDB.claim_achievement afterwards.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, guild_id, user_id):
+        """
+        Returns the claimed set of a user, or None if it isn't loaded.
+        """
+        key = (guild_id, user_id)
+        claimed = self.entries.get(key)
+        if claimed is not None:
+            self.entries.move_to_end(key)
+        return claimed
+
+    def put(self, guild_id, user_id, claimed: set):
+        self.entries[(guild_id, user_id)] = claimed
+        self.entries.move_to_end((guild_id, user_id))
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+class LeaderboardCache:
+    """
+    TTL cache of leaderboard pages keyed by (scope, guild_id, cursor, limit, min_total).
+
+    Entries expire after ttl seconds. Once write_threshold dogs have changed in a guild,
+    that guild's pages are dropped early, and global pages likewise after that many
+    changes anywhere.
+    """
+
+    def __init__(self, ttl: float = 30, write_threshold: int = 25, maxsize: int = 2048):
+        self.ttl = ttl
+        self.write_threshold = write_threshold
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # key -> (expires at, value)
+        self.writes = {}  # guild_id -> dogs changed since its pages were last dropped
+        self.global_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, scope: str, guild_id=None):
+        for key in [key for key in self.entries if key[0] == scope and key[1] == guild_id]:
+            del self.entries[key]
+
+    def note_writes(self, deltas):
+        """
+        Counts written (type, user_id, guild_id, delta) rows and drops pages past the threshold.
+        """
+        for type, user_id, guild_id, delta in deltas:
+            count = self.writes.get(guild_id, 0) + abs(delta)
+            if count >= self.write_threshold:
+                self.invalidate("server", guild_id)
+                count = 0
+            self.writes[guild_id] = count
+            self.global_writes += abs(delta)
+        if self.global_writes >= self.write_threshold:
+            self.invalidate("global")
+            self.global_writes = 0
+
+class AsyncDB:
+    """
+    Async counterpart of DB.
+
+    Writes are handed to a dedicated single-thread executor that owns the writer
+    connection, and reads run on a second executor sized to the reader pool, so sqlite
+    never blocks the event loop and a slow read never holds up a write.
+    Dog changes and achievement claims go through a CatchQueue and are written in
+    batches by flush(). Reads don't wait for flushes: the rows of the queue, and of the
+    batch being written if the read didn't see it yet, are added to what sqlite returns.
+    """
+
+    def __init__(self, db: DB = None, max_pending: int = 500, flush_interval: float = 2.0,
+                 post_retention: float = 90 * 86400, prune_interval: float = 3600):
+        """
+        Args:
+            post_retention: Seconds after which a message is dropped from the DogBoard history.
+            prune_interval: Seconds between prunes of the DogBoard history.
+        """
+        self.db = db or DB()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dogbot-db")
+        self.read_executor = ThreadPoolExecutor(max_workers=self.db.manager.reader_count, thread_name_prefix="dogbot-db-read")
+        self.queue = CatchQueue(max_pending)
+        # (batch number, CatchQueue) taken by flush() and not committed yet
+        self.inflight = None
+        # db.batches once the last flush() finished, reads that saw fewer batches are stale
+        self.flushed = self.db.batches
+        self.flush_interval = flush_interval
+        # Held while a flush or remove_dog writes, so they don't overlap
+        self.flush_lock = asyncio.Lock()
+        self.flush_task = None
+        self.flush_pending = False
+        self.post_retention = post_retention
+        self.prune_interval = prune_interval
+        self.prune_task = None
+        self.leaderboards = LeaderboardCache()
+        self.claims = ClaimCache()
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _read(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.read_executor, functools.partial(func, *args, **kwargs))
+
+    async def _read_queued(self, func, *args):
+        """
+        Runs a read and returns (result, queues), where queues are the CatchQueues holding
+        changes the result doesn't include yet. Runs the read again in the rare case a batch
+        was committed and left in-flight before the read could see it.
+        """
+        while True:
+            batches, result = await self._read(self.db.read_batches, func, *args)
+            if batches >= self.flushed:
+                break
+        queues = [self.queue]
+        if self.inflight is not None and batches < self.inflight[0]:
+            queues.append(self.inflight[1])
+        return result, queues
+
+    def start(self):
+        """
+        Starts the background tasks that flush the catch queue every flush_interval seconds
+        and prune the DogBoard history every prune_interval seconds.
+        """
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_loop())
+        if self.prune_task is None:
+            self.prune_task = asyncio.create_task(self._prune_loop())
+
+    async def _prune_loop(self):
+        while True:
+            try:
+                await self._run(self.db.prune_posted, time.time() - self.post_retention)
+            except Exception as e:
+                print(f"Error pruning DogBoard history: {e}")
+            await asyncio.sleep(self.prune_interval)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # Shielded so close() cancelling the loop can't drop a batch that was already taken
+                # from the queue, close() waits for it on the flush lock instead
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                print(f"Error flushing catch queue: {e}")
+
+    async def _flush_soon(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Error flushing catch queue: {e}")
+        finally:
+            self.flush_pending = False
+
+    async def flush(self):
+        """
+        Writes every queued dog change and achievement claim in one transaction.
+        """
+        async with self.flush_lock:
+            await self._flush()
+
+    async def _flush(self):
+        deltas = self.queue.take()
+        achievements = self.queue.take_achievements()
+        if not (deltas or achievements):
+            return
+        # Still visible to readers until they can see it in sqlite
+        self.inflight = (self.db.batches + 1, CatchQueue.of(deltas, achievements))
+        try:
+            await self._run(self.db.apply_catches, deltas, achievements)
+            self.leaderboards.note_writes(deltas)
+        except Exception:
+            # Put the changes back so the next flush retries them
+            for type, user_id, guild_id, delta in deltas:
+                self.queue.add(type, user_id, guild_id, delta)
+            for claim in achievements:
+                self.queue.claim(*claim)
+            raise
+        finally:
+            self.flushed = self.db.batches
+            self.inflight = None
+
+    def _queue(self, type, user_id, guild_id, amount):
+        if self.queue.add(type, user_id, guild_id, amount) and not self.flush_pending:
+            self.flush_pending = True
+            asyncio.create_task(self._flush_soon())
+
+    async def add_dog(self, type, user_id, guild_id, amount=1):
+        """
+        Queues dogs for the user's inventory and returns the amount they have including queued changes.
+        """
+        self._queue(type, user_id, guild_id, amount)
+        stored, queues = await self._read_queued(self.db.get_dog_amount, type, user_id, guild_id)
+        return stored + sum(queue.amount(type, user_id, guild_id) for queue in queues)
+
+    async def catch_dog(self, type, user_id, guild_id, unlocks):
+        """
+        Adds one caught dog and claims the achievements it unlocks, queued together so they
+        are written in the same transaction.
+
+        Args:
+            unlocks: Called with the amount of that dog the user has after the catch,
+                returns the IDs of the achievements the catch earns.
+
+        Returns:
+            (amount, IDs of the achievements that were newly claimed)
+        """
+        claimed = await self._claimed(guild_id, user_id)
+        stored, queues = await self._read_queued(self.db.get_dog_amount, type, user_id, guild_id)
+        amount = stored + sum(queue.amount(type, user_id, guild_id) for queue in queues) + 1
+        new = [achievement_id for achievement_id in unlocks(amount) if achievement_id not in claimed]
+        # Nothing is awaited from here on, so no flush can split the dog from its claims
+        claimed.update(new)
+        for achievement_id in new:
+            self.queue.claim(guild_id, user_id, achievement_id)
+        self._queue(type, user_id, guild_id, 1)
+        return amount, new
+
+    async def remove_dog(self, type, user_id, guild_id, amount=1):
+        """
+        Removes dogs if the user has enough, counting queued changes.
+        Returns the amount left, or None if they didn't have enough.
+        Written straight away after flushing the queue, since the check has to see the stored amount.
+        """
+        async with self.flush_lock:
+            await self._flush()
+            remaining = await self._run(self.db.remove_dog, type, user_id, guild_id, amount)
+            self.leaderboards.note_writes([(type, user_id, guild_id, amount if remaining is not None else 0)])
+            return remaining
+
+    async def list_dogs(self, user_id, guild_id):
+        dogs, queues = await self._read_queued(self.db.list_dogs, user_id, guild_id)
+        for queue in queues:
+            dogs = queue.apply(dogs, user_id, guild_id)
+        return dogs
+
+    async def _claimed(self, guild_id, user_id) -> set:
+        claimed = self.claims.get(guild_id, user_id)
+        if claimed is None:
+            stored, queues = await self._read_queued(self.db.list_achievements, guild_id, user_id)
+            # Another call may have filled the cache during the read, keep the set it handed out
+            claimed = self.claims.get(guild_id, user_id)
+            if claimed is None:
+                claimed = stored
+                self.claims.put(guild_id, user_id, claimed)
+            else:
+                claimed |= stored
+            for queue in queues:
+                claimed |= queue.claimed(guild_id, user_id)
+        return claimed
+
+    async def claim_achievement(self, guild_id, user_id, achievement_id) -> bool:
+        """
+        Claims an achievement. Returns True if it was new and False if it was already claimed.
+        The claim is queued and written with the next flush, together with any queued catches.
+        """
+        claimed = await self._claimed(guild_id, user_id)
+        if achievement_id in claimed:
+            return False
+        claimed.add(achievement_id)
+        self.queue.claim(guild_id, user_id, achievement_id)
+        return True
+
+    async def list_achievements(self, guild_id, user_id) -> set:
+        """
+        Returns the IDs of the achievements a user has claimed, including queued claims.
+        """
+        return set(await self._claimed(guild_id, user_id))
+
+    async def is_posted(self, message_id) -> bool:
+        return await self._read(self.db.is_posted, message_id)
+
+    def outlived_history(self, message_id) -> bool:
+        """
+        Returns True if a message is older than the DogBoard history keeps, so is_posted
+        can no longer tell whether it was posted.
+        """
+        return message_id < snowflake_at(time.time() - self.post_retention)
+
+    async def mark_posted(self, message_id) -> bool:
+        return await self._run(self.db.mark_posted, message_id)
+
+    async def unmark_posted(self, message_id):
+        return await self._run(self.db.unmark_posted, message_id)
+
+    async def get_leaderboard(self, guild_id):
+        return await self._read(self.db.get_leaderboard, guild_id)
+
+    async def get_global_leaderboard(self, limit=25, min_total=20):
+        return await self._read(self.db.get_global_leaderboard, limit, min_total)
+
+    async def get_leaderboard_page(self, guild_id, after=None, limit=15, min_total=1):
+        """
+        Cached get_leaderboard_page. guild_id None means global, after is the cursor of the previous page.
+        """
+        # Keyed by the cursor rather than a page number, since the rows only depend on it
+        key = ("global" if guild_id is None else "server", guild_id, after, limit, min_total)
+        result = self.leaderboards.get(key)
+        if result is None:
+            result = await self._read(self.db.get_leaderboard_page, guild_id, after, limit, min_total)
+            self.leaderboards.put(key, result)
+        return result
+
+    async def add_channel(self, channel_id: int, guild_id: int):
+        return await self._run(self.db.add_channel, channel_id, guild_id)
+
+    async def remove_channel(self, channel_id, guild_id):
+        return await self._run(self.db.remove_channel, channel_id, guild_id)
+
+    async def list_server_channels(self, guild_id):
+        # Served from the channel registry, no query needed
+        return self.db.list_server_channels(guild_id)
+
+    def spawn_channels(self, shard_id: int = None, shard_count: int = 1):
+        """
+        Returns every configured (guild_id, channel_id) pair, or only those of one shard,
+        without touching sqlite.
+        """
+        return self.db.channels.items(shard_id, shard_count)
+
+    def channels_version(self) -> int:
+        """
+        Returns a number that changes whenever spawn_channels() may return something else.
+        """
+        return self.db.channels.version
+
+    async def clear_server_channels(self, guild_id):
+        return await self._run(self.db.clear_server_channels, guild_id)
+
+    async def close(self):
+        """
+        Flushes the catch queue, waits for queued queries to finish and closes the connection.
         """
-        self.conn.close()
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        if self.prune_task is not None:
+            self.prune_task.cancel()
+            self.prune_task = None
+        await self.flush()
+        self.read_executor.shutdown(wait=True)
+        await self._run(self.db.close)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,79 @@
+import json
+from collections import OrderedDict
+
+class Board:
+    """
+    DogBoard settings of one guild: messages that get threshold reactions of emoji are posted to channel_id.
+    """
+
+    __slots__ = ("guild_id", "channel_id", "emoji", "threshold")
+
+    def __init__(self, guild_id: int, channel_id: int, emoji: str, threshold: int = 5):
+        if threshold < 1:
+            raise ValueError("DogBoard threshold must be at least 1")
+        self.guild_id = int(guild_id)
+        self.channel_id = int(channel_id)
+        self.emoji = emoji
+        self.threshold = threshold
+
+class BoardConfig:
+    """
+    The DogBoard of every guild that has one, keyed by guild ID.
+    """
+
+    def __init__(self, boards):
+        self.boards = {board.guild_id: board for board in boards}
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            return cls(Board(**entry) for entry in json.load(f)["boards"])
+
+    def get(self, guild_id):
+        """
+        Returns the Board of a guild, or None if it has none.
+        """
+        return self.boards.get(guild_id)
+
+class ReactionCounter:
+    """
+    LRU of per-message reaction counts, kept up to date from raw reaction events.
+
+    Reactions made while the bot was offline, or before a message was evicted, are
+    not counted, so counts can only be too low. Callers fetch the message once a
+    count reaches the threshold and correct it with set().
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self.counts = OrderedDict()  # message_id -> count
+
+    def add(self, message_id: int) -> int:
+        """
+        Counts one reaction and returns the new count.
+        """
+        count = self.counts.pop(message_id, 0) + 1
+        self.counts[message_id] = count
+        if len(self.counts) > self.maxsize:
+            self.counts.popitem(last=False)
+        return count
+
+    def remove(self, message_id: int):
+        """
+        Uncounts one reaction.
+        """
+        count = self.counts.get(message_id)
+        if count is not None:
+            self.counts[message_id] = max(0, count - 1)
+
+    def set(self, message_id: int, count: int):
+        self.counts[message_id] = count
+        self.counts.move_to_end(message_id)
+        if len(self.counts) > self.maxsize:
+            self.counts.popitem(last=False)
+
+    def discard(self, message_id: int):
+        self.counts.pop(message_id, None)
+
+    def __len__(self):
+        return len(self.counts)
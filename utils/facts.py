@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+import aiohttp
+
+class FactFeed:
+    """
+    Keeps a buffer of prefetched dog facts so /fact answers from memory.
+
+    A background task tops the buffer up from the Dog API whenever it runs low. Facts
+    that were served or buffered recently are skipped, unless a whole batch is made of
+    them, which means the API knows fewer facts than are remembered. Buffered facts
+    older than max_age are dropped. If the buffer is empty the fact is fetched on the spot.
+    """
+
+    def __init__(self, base_url: str = "https://dogapi.dog", size: int = 20, low_water: int = 5, batch: int = 5,
+                 max_age: float = 6 * 3600, remember: int = None, retry_delay: float = 30, timeout: float = 10):
+        """
+        Args:
+            base_url: Root of the Dog API, point it at a stub server to test offline.
+            size: Facts to keep buffered.
+            low_water: A refill starts once fewer facts than this are buffered.
+            batch: Facts requested per API call.
+            max_age: Seconds a buffered fact stays servable.
+            remember: How many recent facts are remembered for deduplication, twice size by default.
+            retry_delay: Seconds to wait after a failed refill.
+            timeout: Seconds before an API call is given up.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.size = size
+        self.low_water = low_water
+        self.batch = batch
+        self.max_age = max_age
+        self.remember = remember if remember is not None else 2 * size
+        self.retry_delay = retry_delay
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self.session = None
+        self.facts = deque()  # (fetched_at, body), oldest first
+        self.seen = OrderedDict()  # body -> None, recently buffered or served
+        self.wanted = asyncio.Event()
+        self.task = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, session: aiohttp.ClientSession):
+        """
+        Starts refilling with a session owned by the caller.
+        """
+        self.session = session
+        if self.task is None:
+            self.wanted.set()
+            self.task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def fetch(self, limit: int = 1) -> list:
+        """
+        Requests up to limit facts from the API.
+        """
+        async with self.session.get(f"{self.base_url}/api/v2/facts", params={"limit": limit}, timeout=self.timeout) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return [entry["attributes"]["body"] for entry in data["data"]]
+
+    def _remember(self, body: str):
+        self.seen[body] = None
+        self.seen.move_to_end(body)
+        if len(self.seen) > self.remember:
+            self.seen.popitem(last=False)
+
+    def _add(self, bodies, dedupe: bool = True) -> int:
+        added = 0
+        now = time.monotonic()
+        for body in bodies:
+            if (dedupe and body in self.seen) or len(self.facts) >= self.size:
+                continue
+            self._remember(body)
+            self.facts.append((now, body))
+            added += 1
+        return added
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.max_age
+        while self.facts and self.facts[0][0] < cutoff:
+            self.facts.popleft()
+
+    async def _refill_loop(self):
+        while True:
+            await self.wanted.wait()
+            self.wanted.clear()
+            self._expire()
+            while len(self.facts) < self.size:
+                try:
+                    bodies = await self.fetch(self.batch)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+                    print(f"Error prefetching dog facts: {e}")
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                added = self._add(bodies)
+                if not added and len(bodies) >= self.batch:
+                    # A full batch of repeats, the API has no facts left that weren't seen recently
+                    added = self._add(bodies, dedupe=False)
+                if not added:
+                    # Nothing came back, try again when the buffer is drawn from
+                    break
+
+    def get_nowait(self):
+        """
+        Returns a buffered dog fact, or None if the buffer is empty.
+        """
+        self._expire()
+        if len(self.facts) <= self.low_water:
+            self.wanted.set()
+        if not self.facts:
+            return None
+        self.hits += 1
+        return self.facts.popleft()[1]
+
+    async def get(self):
+        """
+        Returns a dog fact, fetching one if the buffer is empty, or None if none could be fetched.
+        """
+        fact = self.get_nowait()
+        if fact is not None:
+            return fact
+
+        self.misses += 1
+        try:
+            bodies = await self.fetch(1)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError) as e:
+            print(f"Error fetching a dog fact: {e}")
+            return None
+        if not bodies:
+            return None
+        self._remember(bodies[0])
+        return bodies[0]
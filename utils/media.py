@@ -0,0 +1,82 @@
+import hashlib
+import io
+import os
+
+import discord
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, without it images are sent as they are
+    Image = None
+
+class MediaRegistry:
+    """
+    Keeps every image the bot sends in memory and hands out BytesIO-backed discord.File objects.
+
+    When Pillow is installed and max_dimension is set, images bigger than that are
+    downscaled and recompressed once. The result is cached on disk under cache_dir,
+    keyed by the hash of the original file, so later startups just read it back.
+    """
+
+    def __init__(self, max_dimension: int = 0, cache_dir: str = os.path.join('media', '.cache')):
+        self.max_dimension = max_dimension
+        self.cache_dir = cache_dir
+        self.assets = {}  # path -> bytes
+
+    def load(self, paths):
+        """
+        Reads every path into memory. Missing files are reported and skipped.
+        """
+        for path in paths:
+            if path in self.assets:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Error loading media {path}: {e}")
+                continue
+            self.assets[path] = self._optimize(path, data)
+
+    def _optimize(self, path: str, data: bytes) -> bytes:
+        if Image is None or not self.max_dimension:
+            return data
+
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        cached = os.path.join(self.cache_dir, f"{digest}-{self.max_dimension}{os.path.splitext(path)[1]}")
+        if os.path.exists(cached):
+            with open(cached, 'rb') as f:
+                return f.read()
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                format = image.format or "PNG"
+                if max(image.size) > self.max_dimension:
+                    image.thumbnail((self.max_dimension, self.max_dimension))
+                output = io.BytesIO()
+                image.save(output, format=format, optimize=True)
+        except Exception as e:
+            print(f"Error optimizing media {path}: {e}")
+            return data
+
+        optimized = output.getvalue()
+        if len(optimized) >= len(data):
+            optimized = data
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(cached, 'wb') as f:
+            f.write(optimized)
+        return optimized
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.assets
+
+    def file(self, path: str, filename: str = None) -> discord.File:
+        """
+        Returns a discord.File for path, from memory when it was loaded and from disk otherwise.
+        """
+        filename = filename or os.path.basename(path)
+        data = self.assets.get(path)
+        if data is None:
+            return discord.File(path, filename=filename)
+        return discord.File(io.BytesIO(data), filename=filename)
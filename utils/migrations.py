@@ -0,0 +1,75 @@
+class Batched:
+    """
+    A migration that moves too much data for one transaction.
+
+    prepare runs in a transaction of its own. Then step(conn, position) runs in one
+    transaction per batch, starting at position 0, until it returns None. Finally
+    finish runs in the transaction that bumps the version. Other connections can read
+    and write between batches. If the process stops half way the migration starts over
+    from prepare, so all three have to be safe to run again.
+    """
+
+    __slots__ = ("prepare", "step", "finish")
+
+    def __init__(self, prepare, step, finish):
+        self.prepare = prepare
+        self.step = step
+        self.finish = finish
+
+def schema_version(conn) -> int:
+    """
+    Returns the schema version stored in PRAGMA user_version.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _transaction(conn, func, *args):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        result = func(conn, *args)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    return result
+
+def migrate(conn, migrations) -> int:
+    """
+    Runs the migrations a database hasn't seen yet, in order.
+
+    Migration N (counting from 1) is either a callable taking the connection or a
+    Batched migration. A callable runs in one transaction together with the bump of
+    PRAGMA user_version to N, so a failed migration leaves the database at the
+    previous version.
+
+    Several processes may start on the same database at once. The version is checked
+    again inside each transaction, so a migration another process finished first is
+    skipped instead of applied twice.
+
+    Returns the schema version afterwards.
+    """
+    version = schema_version(conn)
+    for number, migration in enumerate(migrations, start=1):
+        if number <= version:
+            continue
+
+        def pending(conn, func, *args):
+            if schema_version(conn) >= number:
+                return False
+            func(conn, *args)
+            return True
+
+        if isinstance(migration, Batched):
+            _transaction(conn, pending, migration.prepare)
+            position = 0
+            while position is not None:
+                position = _transaction(conn, lambda conn, position: (
+                    migration.step(conn, position) if schema_version(conn) < number else None
+                ), position)
+            migration = migration.finish
+
+        def apply(conn):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        _transaction(conn, pending, apply)
+        version = number
+    return version
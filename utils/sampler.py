@@ -0,0 +1,70 @@
+import random
+
+class DogSampler:
+    """
+    Picks dogs in proportion to their "chance" using Vose's alias method.
+
+    The tables are built once from the dog list, after which every pick is O(1)
+    regardless of how many dogs there are. Fractional chances are fine.
+    """
+
+    def __init__(self, dogs, rng=None):
+        """
+        Args:
+            dogs: The dog entries from config/dogs.json, each with a "chance".
+            rng: random.Random-like object, pass a seeded one for deterministic picks.
+        """
+        if not dogs:
+            raise ValueError("Cannot sample from an empty dog list")
+        total = sum(dog["chance"] for dog in dogs)
+        if total <= 0:
+            raise ValueError("Dog chances must add up to more than zero")
+
+        self.dogs = list(dogs)
+        self.rng = rng or random.Random()
+
+        count = len(self.dogs)
+        scaled = [dog["chance"] * count / total for dog in self.dogs]
+        self.probability = [0.0] * count
+        self.alias = [0] * count
+
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left is 1 up to float rounding
+        for i in small + large:
+            self.probability[i] = 1.0
+            self.alias[i] = i
+
+    def pick_index(self) -> int:
+        """
+        Returns the index of a random dog in the dog list.
+        """
+        column = self.rng.randrange(len(self.probability))
+        if self.rng.random() < self.probability[column]:
+            return column
+        return self.alias[column]
+
+    def pick(self) -> dict:
+        """
+        Returns a random dog.
+        """
+        return self.dogs[self.pick_index()]
+
+    def sample(self, n: int) -> list:
+        """
+        Returns n independently picked dogs.
+        """
+        dogs, probability, alias = self.dogs, self.probability, self.alias
+        count = len(probability)
+        randrange, rand = self.rng.randrange, self.rng.random
+        result = []
+        for _ in range(n):
+            column = randrange(count)
+            result.append(dogs[column] if rand() < probability[column] else dogs[alias[column]])
+        return result
@@ -0,0 +1,86 @@
+import os
+
+from utils.spawns import SpawnTable
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    """
+    Returns the shard a guild belongs to, using Discord's formula.
+    """
+    return (int(guild_id) >> 22) % shard_count
+
+def parse_shard_ids(value: str):
+    """
+    Parses a shard list like "0-3,6" into [0, 1, 2, 3, 6]. Returns None for an empty value.
+    """
+    if not value:
+        return None
+    ids = []
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        ids.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(ids))
+
+def shard_groups(shard_count: int, processes: int):
+    """
+    Splits shards 0..shard_count-1 into at most `processes` contiguous groups of near equal size.
+    """
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    groups, start = [], 0
+    for i in range(processes):
+        end = start + size + (i < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+def shard_options(environ=os.environ):
+    """
+    Returns the shard_count and shard_ids keyword arguments for AutoShardedBot from
+    SHARD_COUNT and SHARD_IDS. Both unset lets Discord pick the count and runs every shard.
+    """
+    count = environ.get("SHARD_COUNT")
+    ids = parse_shard_ids(environ.get("SHARD_IDS", ""))
+    if ids is not None and count is None:
+        raise EnvironmentError("SHARD_IDS needs SHARD_COUNT to be set as well.")
+    return {"shard_count": int(count) if count else None, "shard_ids": ids}
+
+class ShardState:
+    """
+    Everything one shard spawns with: its active spawns and its spawn scheduler.
+
+    Shards never share spawn state, so a shard can stop and restart its scheduler
+    without touching the others, and a group of shards can move to another process.
+    """
+
+    __slots__ = ("shard_id", "spawns", "scheduler")
+
+    def __init__(self, shard_id: int, make_scheduler):
+        """
+        Args:
+            make_scheduler: Called with the shard ID, returns the SpawnScheduler of that shard.
+        """
+        self.shard_id = shard_id
+        self.spawns = SpawnTable()
+        self.scheduler = make_scheduler(shard_id)
+
+class ShardStates:
+    """
+    ShardState of every shard this process runs, created the first time a shard is seen.
+    """
+
+    def __init__(self, make_scheduler):
+        self.make_scheduler = make_scheduler
+        self.states = {}  # shard_id -> ShardState
+
+    def get(self, shard_id: int) -> ShardState:
+        state = self.states.get(shard_id)
+        if state is None:
+            state = self.states[shard_id] = ShardState(shard_id, self.make_scheduler)
+        return state
+
+    def stop(self):
+        for state in self.states.values():
+            state.scheduler.stop()
+
+    def __iter__(self):
+        return iter(self.states.values())
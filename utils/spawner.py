@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import random
+import time
+
+from utils.metrics import metrics
+
+class SpawnScheduler:
+    """
+    Spawns dogs in every configured channel on its own random timer.
+
+    Due times live in a heap keyed by channel, so a tick only touches the channels
+    that are due. Every due spawn runs as its own task, bounded by a semaphore and a
+    timeout, and ticks don't wait for them, so a slow or failing channel never holds
+    up the others.
+    """
+
+    def __init__(self, spawn, load_channels, min_delay: float = 60, max_delay: float = 300,
+                 concurrency: int = 25, spawn_timeout: float = 30, interval: float = 5, rng=None,
+                 shard_id: int = None, version=None):
+        """
+        Args:
+            spawn: Coroutine function called as spawn(guild_id, channel_id).
+            load_channels: Coroutine function returning the configured (guild_id, channel_id) pairs.
+            min_delay: Minimum seconds between two spawns in one channel.
+            max_delay: Maximum seconds between two spawns in one channel.
+            concurrency: Maximum number of spawns in flight at once.
+            spawn_timeout: Seconds after which a single spawn is abandoned.
+            interval: Seconds between two ticks.
+            rng: random.Random-like object used to pick delays.
+            shard_id: Shard this scheduler serves, appended to its gauge names so shards don't overwrite each other.
+            version: Optional function returning a value that changes whenever load_channels() may
+                return something else. Ticks only reload the channels after it changed.
+        """
+        self.spawn = spawn
+        self.load_channels = load_channels
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.spawn_timeout = spawn_timeout
+        self.interval = interval
+        self.rng = rng or random.Random()
+        self.suffix = "" if shard_id is None else f".shard{shard_id}"
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.heap = []  # (due time, channel_id, generation)
+        self.channels = {}  # channel_id -> (guild_id, generation) of every configured channel
+        self.generation = 0  # bumped whenever a channel is (re)added, so older heap entries go stale
+        self.version = version
+        self.synced = None  # version the channels were last loaded at
+        self.task = None
+        self.inflight = set()  # spawn tasks that haven't finished yet
+
+    def _delay(self) -> float:
+        return self.rng.uniform(self.min_delay, self.max_delay)
+
+    def sync(self, channels):
+        """
+        Schedules newly configured channels. Removed channels are dropped when they come due.
+
+        A channel that is removed and added again gets a new generation, so its old heap
+        entry is skipped instead of doubling its spawn rate.
+        """
+        now = time.monotonic()
+        configured = {}
+        for guild_id, channel_id in channels:
+            known = self.channels.get(channel_id)
+            if known is None:
+                self.generation += 1
+                generation = self.generation
+                heapq.heappush(self.heap, (now + self._delay(), channel_id, generation))
+            else:
+                generation = known[1]
+            configured[channel_id] = (guild_id, generation)
+        self.channels = configured
+
+    def due(self, now: float):
+        """
+        Pops every channel whose due time has passed.
+        """
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            _, channel_id, generation = heapq.heappop(self.heap)
+            known = self.channels.get(channel_id)
+            if known is not None and known[1] == generation:
+                due.append((known[0], channel_id, generation))
+        return due
+
+    async def _spawn_one(self, guild_id: int, channel_id: int, generation: int):
+        try:
+            async with self.semaphore:
+                await asyncio.wait_for(self.spawn(guild_id, channel_id), self.spawn_timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("spawn_timeouts")
+            print(f"Spawning a dog in channel {channel_id} timed out.")
+        except Exception as e:
+            metrics.incr("spawn_errors")
+            print(f"Error spawning dog in channel {channel_id}: {e}")
+        finally:
+            # Also reschedule when stop() cancels this spawn, or the channel would never spawn again
+            heapq.heappush(self.heap, (time.monotonic() + self._delay(), channel_id, generation))
+
+    async def tick(self):
+        """
+        Starts a spawn task for every due channel without waiting for them to finish.
+        """
+        start = time.monotonic()
+        version = self.version() if self.version is not None else None
+        if version is None or version != self.synced:
+            self.sync(await self.load_channels())
+            self.synced = version
+        due = self.due(start)
+        metrics.gauge("spawn_backlog" + self.suffix, len(due))
+        for guild_id, channel_id, generation in due:
+            task = asyncio.create_task(self._spawn_one(guild_id, channel_id, generation))
+            self.inflight.add(task)
+            task.add_done_callback(self.inflight.discard)
+        metrics.observe("spawn_tick", time.monotonic() - start)
+        metrics.gauge("spawn_channels" + self.suffix, len(self.channels))
+        metrics.gauge("spawn_inflight" + self.suffix, len(self.inflight))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"Error in spawn tick: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """
+        Starts ticking in the background. Does nothing if already running.
+        """
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        """
+        Stops ticking and cancels the spawns in flight. Their channels stay scheduled for the next start().
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for task in self.inflight:
+            task.cancel()
@@ -0,0 +1,42 @@
+class Spawn:
+    """
+    A dog waiting to be caught in a channel.
+    """
+
+    __slots__ = ("channel_id", "message_id", "dog_index", "spawned_at")
+
+    def __init__(self, channel_id: int, message_id: int, dog_index: int, spawned_at: float):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.dog_index = dog_index
+        self.spawned_at = spawned_at
+
+class SpawnTable:
+    """
+    Active spawns keyed by channel ID.
+
+    claim() removes the spawn in the same synchronous step that reads it, so when two
+    people type "dog" at once only the first one to reach claim() gets the dog, no
+    matter what the handlers await afterwards.
+    """
+
+    def __init__(self):
+        self.spawns = {}  # channel_id -> Spawn
+
+    def add(self, spawn: Spawn):
+        self.spawns[spawn.channel_id] = spawn
+
+    def get(self, channel_id: int):
+        return self.spawns.get(channel_id)
+
+    def claim(self, channel_id: int):
+        """
+        Removes and returns the spawn of a channel, or None if there is nothing to catch.
+        """
+        return self.spawns.pop(channel_id, None)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.spawns
+
+    def __len__(self):
+        return len(self.spawns)
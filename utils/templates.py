@@ -0,0 +1,72 @@
+import discord
+
+ACHIEVEMENT_COLOR = discord.Color(0x265526)
+
+class EmbedTemplate:
+    """
+    A prebuilt embed that is cloned instead of rebuilt.
+
+    The clone shares every attribute with the template except the footer, which is
+    the only part that changes per user, so cloning is a handful of attribute copies.
+    """
+
+    __slots__ = ("embed", "attributes")
+
+    def __init__(self, embed: discord.Embed):
+        self.embed = embed
+        self.attributes = [
+            (name, getattr(embed, name)) for name in discord.Embed.__slots__
+            if name != "_footer" and hasattr(embed, name)
+        ]
+
+    def clone(self, footer: str = None) -> discord.Embed:
+        embed = object.__new__(discord.Embed)
+        for name, value in self.attributes:
+            setattr(embed, name, value)
+        if footer is not None:
+            embed.set_footer(text=footer)
+        return embed
+
+class Templates:
+    """
+    Static payloads built once at startup: achievement announcements and spawn messages.
+    """
+
+    def __init__(self, achievements, dogs):
+        """
+        Args:
+            achievements: The entries of config/achievements.json.
+            dogs: The dog entries of config/dogs.json.
+        """
+        self.achievements = {}
+        for achievement in achievements:
+            announcement = achievement.get("announcement")
+            if announcement is None:
+                continue
+            embed = discord.Embed(
+                color=ACHIEVEMENT_COLOR,
+                title=announcement["title"],
+                description=announcement["description"]
+            )
+            embed.set_author(
+                name="Achievement Unlocked!",
+                icon_url="attachment://achievements.png"
+            )
+            self.achievements[achievement["ID"]] = EmbedTemplate(embed)
+
+        self.spawns = {
+            dog["name"]: f"A {dog['emoji']} {dog['name']} has spawned! Type 'dog' to catch it!"
+            for dog in dogs
+        }
+
+    def achievement(self, achievement_id: str, user_name: str) -> discord.Embed:
+        """
+        Returns the "Achievement Unlocked!" embed of an achievement, unlocked by user_name.
+        """
+        return self.achievements[achievement_id].clone(f"Unlocked by {user_name}")
+
+    def spawn(self, dog) -> str:
+        """
+        Returns the spawn announcement of a dog.
+        """
+        return self.spawns[dog["name"]]
@@ -0,0 +1,72 @@
+import json
+import re
+
+class Trigger:
+    """
+    A chat phrase that unlocks an achievement and can reply with an image.
+    """
+
+    __slots__ = ("phrases", "match", "case_sensitive", "achievement", "image", "image_title")
+
+    def __init__(self, phrases, achievement: str, match: str = "exact", case_sensitive: bool = False,
+                 image: str = None, image_title: str = None):
+        if match not in ("exact", "contains"):
+            raise ValueError(f"Unknown trigger match mode {match!r}")
+        self.phrases = [phrase if case_sensitive else phrase.lower() for phrase in phrases]
+        self.match = match
+        self.case_sensitive = case_sensitive
+        self.achievement = achievement
+        self.image = image
+        self.image_title = image_title
+
+class TriggerTable:
+    """
+    Compiled lookup of every phrase trigger.
+
+    Exact phrases go into dicts, so they cost one hash lookup per message, and all
+    "contains" phrases are joined into one regex, so a message is scanned once no
+    matter how many of them there are. Exact matches win over contains matches.
+    """
+
+    def __init__(self, triggers):
+        self.triggers = list(triggers)
+        self.exact = {}  # lowercased phrase -> Trigger
+        self.exact_case_sensitive = {}  # phrase -> Trigger
+        contains = {}  # phrase -> Trigger, in config order
+
+        for trigger in self.triggers:
+            for phrase in trigger.phrases:
+                if trigger.match == "exact":
+                    target = self.exact_case_sensitive if trigger.case_sensitive else self.exact
+                    target.setdefault(phrase, trigger)
+                else:
+                    contains.setdefault(phrase, trigger)
+
+        if any(trigger.case_sensitive for trigger in contains.values()):
+            raise ValueError("Case sensitive triggers must use exact matching")
+        self.contains = contains
+        # Longest phrases first so overlapping phrases prefer the most specific one
+        self.pattern = re.compile("|".join(re.escape(phrase) for phrase in sorted(contains, key=len, reverse=True))) if contains else None
+
+    @classmethod
+    def from_file(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            return cls(Trigger(**entry) for entry in json.load(f)["triggers"])
+
+    def match(self, content: str, lowered: str = None):
+        """
+        Returns the trigger for a message, or None.
+
+        Args:
+            content: The message content as sent.
+            lowered: content.lower(), if the caller already has it.
+        """
+        if lowered is None:
+            lowered = content.lower()
+
+        trigger = self.exact_case_sensitive.get(content) or self.exact.get(lowered)
+        if trigger is not None or self.pattern is None:
+            return trigger
+
+        found = self.pattern.search(lowered)
+        return self.contains[found.group()] if found else None